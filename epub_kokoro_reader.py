@@ -1,11 +1,12 @@
 import sys
 
-from PySide6 import QtWidgets
 
-from src.epub_reader import EpubReaderApp
+def main():
+    # Qt, QtWebEngine and the Kokoro pipeline are heavy; import them only when launching.
+    from PySide6 import QtWidgets
 
+    from src.epub_reader import EpubReaderApp
 
-def main():
     print("Starting EPUB reader...", file=sys.stderr, flush=True)
     qt_app = QtWidgets.QApplication(sys.argv)
     window = EpubReaderApp()
@@ -1,33 +1,48 @@
 import argparse
 import re
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 from bs4 import BeautifulSoup
 from ebooklib import ITEM_DOCUMENT, epub
 
+_WHITESPACE_RE = re.compile(r"\s+")
+_FILENAME_UNSAFE = str.maketrans({char: "_" for char in '\\/:*?"<>|'})
+# A line starting with exactly "Summary" (case-sensitive), optionally followed by ':' or '-'.
+_SUMMARY_RE = re.compile(r"(?m)^[ \t]*Summary[ \t]*[:\-]?")
+_HEADER_TAGS = ["h1", "h2", "h3"]
+_TITLE_TAGS = ["title", *_HEADER_TAGS]
 
-def clean_chapter_text(html_bytes: bytes) -> str:
-    soup = BeautifulSoup(html_bytes, "html.parser")
-    for tag in soup(["script", "style", "noscript"]):
-        tag.decompose()
 
-    text = soup.get_text(separator="\n")
-    lines = [re.sub(r"\s+", " ", line).strip() for line in text.splitlines()]
-    filtered = [line for line in lines if line]
-    cleaned = "\n".join(filtered)
-    cleaned = re.sub(r"\n{3,}", "\n\n", cleaned)
-    return cleaned.strip()
+def parse_chapter_html(html_bytes: bytes) -> BeautifulSoup:
+    return BeautifulSoup(html_bytes, "lxml")
 
 
-def chapter_title(html_bytes: bytes, fallback: str) -> str:
-    soup = BeautifulSoup(html_bytes, "html.parser")
+def clean_chapter_text(soup: BeautifulSoup) -> str:
+    for tag in soup(["script", "style", "noscript"]):
+        tag.decompose()
 
-    if soup.title and soup.title.string:
-        title = soup.title.string.strip()
+    text = soup.get_text(separator="\n")
+    # Blank lines are dropped here, so no further newline collapsing is needed.
+    lines = (_WHITESPACE_RE.sub(" ", line).strip() for line in text.splitlines())
+    return "\n".join(filter(None, lines))
+
+
+def chapter_title(soup: BeautifulSoup, fallback: str) -> str:
+    # Walk to whichever of <title>/<h1-h3> comes first and continue from there,
+    # instead of one walk for soup.title and a second one from the top for a header.
+    first = soup.find(_TITLE_TAGS)
+    if first is None:
+        return fallback or "Untitled"
+    is_title = first.name == "title"
+
+    title_tag = first if is_title else first.find_next("title")
+    if title_tag and title_tag.string:
+        title = title_tag.string.strip()
         if title:
             return title
 
-    header = soup.find(["h1", "h2", "h3"])
+    header = first.find_next(_HEADER_TAGS) if is_title else first
     if header:
         value = header.get_text(strip=True)
         if value:
@@ -37,14 +52,36 @@ def chapter_title(html_bytes: bytes, fallback: str) -> str:
 
 
 def safe_filename(value: str, max_len: int = 80) -> str:
-    value = re.sub(r"[\\/:*?\"<>|]", "_", value)
-    value = re.sub(r"\s+", "_", value).strip("._ ")
+    value = value.translate(_FILENAME_UNSAFE)
+    value = _WHITESPACE_RE.sub("_", value).strip("._ ")
     if not value:
         value = "Untitled"
     return value[:max_len]
 
 
-def extract_epub_to_txt(epub_path: Path, out_dir: Path) -> int:
+def _write_text_file(path: Path, text: str) -> None:
+    with path.open("wb", buffering=1 << 20) as handle:
+        handle.write(text.encode("utf-8"))
+        handle.write(b"\n")
+
+
+def clean_chapter(html_bytes: bytes, fallback_title: str) -> tuple[str, str]:
+    """Return ``(title, text)`` for a chapter from a single HTML parse."""
+    soup = parse_chapter_html(html_bytes)
+    # Read the title before cleaning decomposes parts of the tree.
+    title = chapter_title(soup, fallback_title)
+    return title, clean_chapter_text(soup)
+
+
+def _convert_chapter(job: tuple[bytes, str | None]) -> tuple[str, str] | None:
+    html_bytes, name = job
+    title, text = clean_chapter(html_bytes, Path(name or "Untitled").stem)
+    if not text:
+        return None
+    return title, text
+
+
+def extract_epub_to_txt(epub_path: Path, out_dir: Path, workers: int | None = None) -> int:
     if not epub_path.exists():
         raise FileNotFoundError(f"EPUB not found: {epub_path}")
 
@@ -59,26 +96,35 @@ def extract_epub_to_txt(epub_path: Path, out_dir: Path) -> int:
         old_sum.unlink()
 
     book = epub.read_epub(str(epub_path))
-    items_by_id = {item.id: item for item in book.get_items()}
-
-    written = 0
-    for index, (spine_id, _linear) in enumerate(book.spine, start=1):
-        item = items_by_id.get(spine_id)
-        if not item or item.get_type() != ITEM_DOCUMENT:
+    # Index only spine documents; images, fonts and other assets are never needed.
+    spine_ids = {spine_id for spine_id, _linear in book.spine}
+    documents_by_id = {
+        item.id: item
+        for item in book.get_items_of_type(ITEM_DOCUMENT)
+        if item.id in spine_ids
+    }
+
+    # Only raw bytes and names cross the process boundary, never ebooklib objects.
+    jobs = []
+    for spine_id, _linear in book.spine:
+        item = documents_by_id.get(spine_id)
+        if item is None:
             continue
+        jobs.append((item.get_content(), item.get_name()))
 
-        html_bytes = item.get_content()
-        text = clean_chapter_text(html_bytes)
-        if not text:
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        chapters = list(executor.map(_convert_chapter, jobs, chunksize=4))
+
+    written = 0
+    for chapter in chapters:
+        if chapter is None:
             continue
 
-        fallback_title = Path(item.get_name() or "Untitled").stem
-        title = chapter_title(html_bytes, fallback_title)
+        title, text = chapter
         filename = f"{written + 1:03d}_{safe_filename(title)}.txt"
 
         # Split out a trailing "Summary" section (if present) into its own file.
-        # Match a line starting with exactly "Summary" (case-sensitive), optionally followed by ':' or '-' and text.
-        summary_match = re.search(r"(?m)^[ \t]*Summary[ \t]*[:\-]?", text)
+        summary_match = _SUMMARY_RE.search(text)
 
         output_path = out_dir / filename
         if summary_match:
@@ -87,14 +133,14 @@ def extract_epub_to_txt(epub_path: Path, out_dir: Path) -> int:
             summary_text = text[split_at:].lstrip()
 
             # Write main chapter text (without the summary)
-            output_path.write_text((main_text + "\n") if main_text else "\n", encoding="utf-8")
+            _write_text_file(output_path, main_text)
 
             # Write summary to a separate file with '_summary' suffix in summaries_dir
             summary_filename = output_path.stem + "_summary" + output_path.suffix
             summary_path = summaries_dir / summary_filename
-            summary_path.write_text(summary_text + "\n", encoding="utf-8")
+            _write_text_file(summary_path, summary_text)
         else:
-            output_path.write_text(text + "\n", encoding="utf-8")
+            _write_text_file(output_path, text)
         written += 1
 
     if written == 0:
@@ -114,12 +160,18 @@ def parse_args() -> argparse.Namespace:
         default=Path("sample") / "epub_out",
         help="Output directory for chapter txt files (default: sample/epub_out)",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Worker processes for chapter conversion (default: CPU count)",
+    )
     return parser.parse_args()
 
 
 def main() -> int:
     args = parse_args()
-    count = extract_epub_to_txt(args.epub_path, args.out_dir)
+    count = extract_epub_to_txt(args.epub_path, args.out_dir, workers=args.workers)
     print(f"Wrote {count} chapter file(s) to: {args.out_dir}")
     return 0
 
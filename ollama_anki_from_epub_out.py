@@ -1,23 +1,26 @@
 import argparse
-import json
+import asyncio
+import hashlib
 import math
+import os
 import re
 import sys
-import time
 from pathlib import Path
-from typing import List
+from typing import Any, BinaryIO, List
 
-from src.anki_gen.validator import build_tsv_row_from_card, parse_cards_content
-from src.anki_gen.llm import make_prompt, call_llm
+import numpy as np
+import orjson
 
-
-HEADER_LINES = [
-    "#separator:tab",
-    "#html:true",
-    "#notetype column:1",
-    "#deck column:2",
-    "#tags column:14",
-]
+from src.anki_gen.schemas import HEADER_LINES, BatchedCardsPayload
+from src.anki_gen.validator import build_tsv_row_from_validated_card, parse_cards_content
+from src.anki_gen.llm import (
+    call_llm_async,
+    close_async_client,
+    create_async_client,
+    make_batched_prompt,
+    make_prompt,
+)
+from src.anki_gen.prompt_cache import CallCoalescer, PromptCache, chunk_cache_key
 
 
 def parse_chunk_range(value: str) -> tuple[int, int]:
@@ -90,25 +93,63 @@ def parse_args() -> argparse.Namespace:
         default=None,
         help="Inclusive 1-based global chunk range to process, e.g. 1-12",
     )
-    return parser.parse_args()
+    parser.add_argument(
+        "--batch-chunks",
+        type=int,
+        default=1,
+        help="Number of chunks sent together in one LLM request (default: 1)",
+    )
+    parser.add_argument(
+        "--cache-file",
+        type=Path,
+        default=Path("sample") / ".prompt_cache.sqlite",
+        help="SQLite cache of prompt responses (default: sample/.prompt_cache.sqlite)",
+    )
+    parser.add_argument(
+        "--min-chapter-chars",
+        type=int,
+        default=None,
+        help="Skip chapter files shorter than this many characters "
+        "(default: max(200, chunk size // 10))",
+    )
+    parser.add_argument(
+        "--min-chunk-sentences",
+        type=int,
+        default=5,
+        help="Skip chunks with fewer sentence terminators (. ? !), e.g. TOC pages (default: 5)",
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="Always call the LLM, ignoring and not updating the prompt cache",
+    )
+    args = parser.parse_args()
+    if args.min_chapter_chars is None:
+        args.min_chapter_chars = default_min_chapter_chars(args.chunk_size)
+    return args
+
+
+def default_min_chapter_chars(chunk_size: int) -> int:
+    # A tenth of a chunk, so larger chunk sizes also skip longer stub chapters.
+    return max(200, chunk_size // 10)
 
 
 def build_main_ranges(text_length: int, chunk_size: int) -> List[tuple[int, int]]:
+    return list(zip(*(bounds.tolist() for bounds in _main_bounds(text_length, chunk_size))))
+
+
+def _main_bounds(text_length: int, chunk_size: int) -> tuple[np.ndarray, np.ndarray]:
     if text_length <= 0:
-        return []
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
 
+    # Blocks are as even as possible; the first `remainder` blocks get one extra char.
     block_count = max(1, math.ceil(text_length / chunk_size))
-    base_size = text_length // block_count
-    remainder = text_length % block_count
-
-    ranges: List[tuple[int, int]] = []
-    start = 0
-    for index in range(block_count):
-        current_size = base_size + (1 if index < remainder else 0)
-        end = min(start + current_size, text_length)
-        ranges.append((start, end))
-        start = end
-    return ranges
+    base_size, remainder = divmod(text_length, block_count)
+    sizes = np.full(block_count, base_size, dtype=np.int64)
+    sizes[:remainder] += 1
+    edges = np.concatenate(([0], np.cumsum(sizes)))
+    return edges[:-1], edges[1:]
 
 
 def split_text_with_overlap(text: str, chunk_size: int, overlap: int) -> List[dict]:
@@ -120,32 +161,31 @@ def split_text_with_overlap(text: str, chunk_size: int, overlap: int) -> List[di
         return []
 
     chunks: List[dict] = []
-    ranges = build_main_ranges(len(text), chunk_size)
-
-    for main_start, main_end in ranges:
-        before_start = max(0, main_start - overlap)
-        before_end = main_start
-        after_start = main_end
-        after_end = min(len(text), main_end + overlap)
-
+    main_starts, main_ends = _main_bounds(len(text), chunk_size)
+    before_starts = np.maximum(0, main_starts - overlap)
+    after_ends = np.minimum(len(text), main_ends + overlap)
+
+    for main_start, main_end, before_start, after_end in zip(
+        main_starts.tolist(),
+        main_ends.tolist(),
+        before_starts.tolist(),
+        after_ends.tolist(),
+    ):
         main_block = text[main_start:main_end].strip()
-        context_before = text[before_start:before_end].strip()
-        context_after = text[after_start:after_end].strip()
-
-        if main_block:
-            chunks.append(
-                {
-                    "main_block": main_block,
-                    "context_before": context_before,
-                    "context_after": context_after,
-                    "main_start": main_start,
-                    "main_end": main_end,
-                    "before_start": before_start,
-                    "before_end": before_end,
-                    "after_start": after_start,
-                    "after_end": after_end,
-                }
-            )
+        if not main_block:
+            continue
+
+        chunks.append(
+            {
+                "main_block": main_block,
+                "main_start": main_start,
+                "main_end": main_end,
+                "before_start": before_start,
+                "before_end": main_start,
+                "after_start": main_end,
+                "after_end": after_end,
+            }
+        )
 
     return chunks
 
@@ -188,11 +228,134 @@ def log_failed_chunk(
         "after_end": chunk.get("after_end"),
     }
     failed_log_path.parent.mkdir(parents=True, exist_ok=True)
-    with failed_log_path.open("a", encoding="utf-8") as handle:
-        handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+    with failed_log_path.open("ab") as handle:
+        handle.write(orjson.dumps(entry, option=orjson.OPT_APPEND_NEWLINE))
+
+
+def _chunk_label(indices: List[int], chunk_total: int) -> str:
+    if len(indices) == 1:
+        return f"chunk {indices[0]}/{chunk_total}"
+    return f"chunks {indices[0]}-{indices[-1]}/{chunk_total}"
+
+
+async def _process_batch(
+    client: Any,
+    prompt: str,
+    response_model: Any,
+    cache_key: str,
+    txt_file: Path,
+    batch: List[tuple[int, dict]],
+    chunk_total: int,
+    model: str,
+    provider: str,
+    deck: str,
+    chunk_size: int,
+    overlap: int,
+    failed_log_path: Path,
+    cache: PromptCache | None = None,
+    coalescer: CallCoalescer | None = None,
+) -> list[dict] | None:
+    if cache is not None:
+        cached_cards = cache.get(cache_key)
+        if cached_cards is not None:
+            return cached_cards
+
+    async def request_cards() -> list[dict]:
+        response_content = await call_llm_async(
+            prompt=prompt,
+            model=model,
+            provider=provider,
+            think="medium",
+            client=client,
+            response_model=response_model,
+        )
+        return parse_cards_content(response_content)
+
+    label = _chunk_label([index for index, _chunk in batch], chunk_total)
+    for attempt in range(3):
+        try:
+            if coalescer is None:
+                cards = await request_cards()
+            else:
+                cards = await coalescer.run(cache_key, request_cards)
+            if cache is not None:
+                cache.set(cache_key, cards)
+            return cards
+        except RuntimeError as exc:
+            if attempt < 2:
+                print(
+                    f"Call failed for {txt_file.name} {label} (attempt {attempt+1}/3), retrying...",
+                    file=sys.stderr,
+                )
+                await asyncio.sleep(1)
+                continue
+            error = str(exc)
+            message = f"Failed {txt_file.name} {label} -> logged to {failed_log_path.name}"
+        except Exception as exc:
+            if attempt < 2:
+                print(
+                    f"Parse failed for {txt_file.name} {label} (attempt {attempt+1}/3), retrying...",
+                    file=sys.stderr,
+                )
+                await asyncio.sleep(1)
+                continue
+            error = f"Failed to parse response after 3 attempts: {exc}"
+            message = f"Failed to parse {txt_file.name} {label} -> logged to {failed_log_path.name}"
+
+        for chunk_index, chunk in batch:
+            log_failed_chunk(
+                failed_log_path=failed_log_path,
+                txt_file=txt_file,
+                chunk_index=chunk_index,
+                chunk_total=chunk_total,
+                chunk=chunk,
+                error=error,
+                model=model,
+                deck=deck,
+                chunk_size=chunk_size,
+                overlap=overlap,
+            )
+        print(message, file=sys.stderr)
+    return None
 
 
-def generate_anki_file(
+def _card_key(card: dict) -> bytes:
+    # Fixed-size digest of the card content (minus id) used for dedupe.
+    content = {key: value for key, value in card.items() if key != "id"}
+    return hashlib.blake2b(
+        orjson.dumps(content, option=orjson.OPT_SORT_KEYS),
+        digest_size=16,
+    ).digest()
+
+
+def _sentence_count(text: str) -> int:
+    return text.count(".") + text.count("?") + text.count("!")
+
+
+def chunk_contexts(text: str, chunk: dict) -> tuple[str, str]:
+    """Slice a chunk's overlap context out of the source text on demand."""
+    context_before = text[chunk["before_start"] : chunk["before_end"]].strip()
+    context_after = text[chunk["after_start"] : chunk["after_end"]].strip()
+    return context_before, context_after
+
+
+def _batch_prompt(text: str, batch: List[tuple[int, dict]]) -> tuple[str, Any, List[dict]]:
+    blocks = []
+    for _index, chunk in batch:
+        context_before, context_after = chunk_contexts(text, chunk)
+        blocks.append(
+            {
+                "main_block": chunk["main_block"],
+                "context_before": context_before,
+                "context_after": context_after,
+            }
+        )
+    if len(blocks) == 1:
+        return make_prompt(**blocks[0]), None, blocks
+    return make_batched_prompt(blocks), BatchedCardsPayload, blocks
+
+
+async def generate_anki_file(
     input_dir: Path,
     output_file: Path,
     model: str,
@@ -202,164 +365,201 @@ def generate_anki_file(
     overlap: int,
     limit_chunks: int | None,
     chunk_range: tuple[int, int] | None = None,
+    batch_chunks: int = 1,
+    cache_path: Path | None = None,
+    min_chapter_chars: int = 0,
+    min_chunk_sentences: int = 0,
 ) -> int:
+    if batch_chunks < 1:
+        raise ValueError("batch_chunks must be >= 1")
+
     txt_files = gather_txt_files(input_dir)
     failed_log_path = output_file.with_suffix(".failed.jsonl")
 
-    rows: List[str] = []
-    seen = set()
+    row_count = 0
+    seen: set[bytes] = set()
+    seen_add = seen.add
     id_prefix = output_file.name
     next_id = 1
-    processed_chunks = 0
-    global_chunk_index = 0
-    range_exhausted = False
-
-    for txt_file in txt_files:
-        text = txt_file.read_text(encoding="utf-8", errors="ignore")
-        chunks = split_text_with_overlap(
-            text,
-            chunk_size=chunk_size,
-            overlap=overlap,
-        )
 
-        for index, chunk in enumerate(chunks, start=1):
-            global_chunk_index += 1
-
-            if chunk_range is not None:
-                range_start, range_end = chunk_range
-                if global_chunk_index < range_start:
+    # Producer -> OLLAMA_NUM_PARALLEL consumers -> single writer. Reading the next
+    # file overlaps with in-flight LLM calls; the bounded queue applies backpressure.
+    worker_count = max(1, int(os.getenv("OLLAMA_NUM_PARALLEL", "4")))
+    work_queue: asyncio.Queue = asyncio.Queue(maxsize=2 * worker_count)
+    result_queue: asyncio.Queue = asyncio.Queue()
+
+    async def produce() -> None:
+        dispatched_chunks = 0
+        global_chunk_index = 0
+        sequence = 0
+        try:
+            for txt_file in txt_files:
+                text = await asyncio.to_thread(
+                    txt_file.read_text, encoding="utf-8", errors="ignore"
+                )
+                chunks = split_text_with_overlap(
+                    text,
+                    chunk_size=chunk_size,
+                    overlap=overlap,
+                )
+                if len(text.strip()) < min_chapter_chars:
+                    # Stub chapters (copyright, headings) rarely yield cards. Their
+                    # chunks still count so --chunk-range stays stable across runs.
+                    global_chunk_index += len(chunks)
+                    print(f"Skipped short chapter {txt_file.name}", file=sys.stderr)
                     continue
-                if global_chunk_index > range_end:
-                    range_exhausted = True
-                    break
 
-            if limit_chunks is not None and processed_chunks >= limit_chunks:
-                break
-            prompt = make_prompt(
-                main_block=chunk["main_block"],
-                context_before=chunk["context_before"],
-                context_after=chunk["context_after"],
-            )
-            response_content = None
-            cards = None
-            last_exc = None
-            for attempt in range(3):
-                try:
-                    response_content = call_llm(
-                        prompt=prompt,
-                        model=model,
-                        provider=provider,
-                        think="medium",
-                    )
-                    cards = parse_cards_content(response_content)
-                    break
-                except RuntimeError as exc:
-                    last_exc = exc
-                    if attempt < 2:
-                        print(
-                            f"Call failed for {txt_file.name} chunk {index}/{len(chunks)} (attempt {attempt+1}/3), retrying...",
-                            file=sys.stderr,
-                        )
-                        time.sleep(1)
-                        continue
-                    log_failed_chunk(
-                        failed_log_path=failed_log_path,
-                        txt_file=txt_file,
-                        chunk_index=index,
-                        chunk_total=len(chunks),
-                        chunk=chunk,
-                        error=str(exc),
-                        model=model,
-                        deck=deck,
-                        chunk_size=chunk_size,
-                        overlap=overlap,
-                    )
-                    print(
-                        f"Failed {txt_file.name} chunk {index}/{len(chunks)} -> logged to {failed_log_path.name}",
-                        file=sys.stderr,
-                    )
-                except Exception as exc:
-                    last_exc = exc
-                    if attempt < 2:
+                selected: List[tuple[int, dict]] = []
+                range_exhausted = False
+                for index, chunk in enumerate(chunks, start=1):
+                    global_chunk_index += 1
+
+                    if chunk_range is not None:
+                        range_start, range_end = chunk_range
+                        if global_chunk_index < range_start:
+                            continue
+                        if global_chunk_index > range_end:
+                            range_exhausted = True
+                            break
+
+                    if limit_chunks is not None and dispatched_chunks >= limit_chunks:
+                        break
+                    if _sentence_count(chunk["main_block"]) < min_chunk_sentences:
                         print(
-                            f"Parse failed for {txt_file.name} chunk {index}/{len(chunks)} (attempt {attempt+1}/3), retrying...",
+                            f"Skipped non-prose {txt_file.name} chunk {index}/{len(chunks)}",
                             file=sys.stderr,
                         )
-                        time.sleep(1)
                         continue
-                    log_failed_chunk(
-                        failed_log_path=failed_log_path,
-                        txt_file=txt_file,
-                        chunk_index=index,
-                        chunk_total=len(chunks),
-                        chunk=chunk,
-                        error=f"Failed to parse response after 3 attempts: {exc}",
-                        model=model,
-                        deck=deck,
-                        chunk_size=chunk_size,
-                        overlap=overlap,
-                    )
-                    print(
-                        f"Failed to parse {txt_file.name} chunk {index}/{len(chunks)} -> logged to {failed_log_path.name}",
-                        file=sys.stderr,
-                    )
-            if cards is None:
-                continue
+                    selected.append((index, chunk))
+                    dispatched_chunks += 1
 
-            chunk_rows = 0
-            for card in cards:
-                dedupe_key = json.dumps(
-                    {key: value for key, value in card.items() if key != "id"},
-                    sort_keys=True,
-                    ensure_ascii=False,
-                )
-                if dedupe_key in seen:
-                    continue
+                # Each batch of up to batch_chunks chunks shares one LLM request.
+                for start in range(0, len(selected), batch_chunks):
+                    batch = selected[start : start + batch_chunks]
+                    await work_queue.put((sequence, txt_file, text, batch, len(chunks)))
+                    sequence += 1
 
-                card_with_id = dict(card)
-                card_with_id["id"] = f"{id_prefix}__{next_id:04d}"
-                next_id += 1
-
-                try:
-                    row = build_tsv_row_from_card(card_with_id, deck=deck)
-                except ValueError:
+                if limit_chunks is not None and dispatched_chunks >= limit_chunks:
+                    break
+                if range_exhausted:
+                    break
+        finally:
+            for _ in range(worker_count):
+                await work_queue.put(None)
+
+    async def consume() -> None:
+        while True:
+            item = await work_queue.get()
+            if item is None:
+                return
+            sequence, txt_file, text, batch, chunk_total = item
+            prompt, response_model, blocks = _batch_prompt(text, batch)
+            cards = await _process_batch(
+                client,
+                prompt,
+                response_model,
+                chunk_cache_key(model, blocks),
+                txt_file=txt_file,
+                batch=batch,
+                chunk_total=chunk_total,
+                model=model,
+                provider=provider,
+                deck=deck,
+                chunk_size=chunk_size,
+                overlap=overlap,
+                failed_log_path=failed_log_path,
+                cache=cache,
+                coalescer=coalescer,
+            )
+            await result_queue.put((sequence, txt_file, batch, chunk_total, cards))
+
+    async def write(out: BinaryIO) -> None:
+        nonlocal next_id, row_count
+        # Results arrive in completion order; emit them in dispatch order so
+        # ids and dedupe stay deterministic.
+        pending: dict[int, tuple] = {}
+        expected = 0
+        while True:
+            item = await result_queue.get()
+            if item is None:
+                return
+            pending[item[0]] = item
+            while expected in pending:
+                _sequence, txt_file, batch, chunk_total, cards = pending.pop(expected)
+                expected += 1
+                if cards is None:
                     continue
 
-                seen.add(dedupe_key)
-                rows.append(row)
-                chunk_rows += 1
-
-            processed_chunks += 1
-
-            print(
-                f"Processed {txt_file.name} chunk {index}/{len(chunks)} -> {chunk_rows} card row(s)",
-                file=sys.stderr,
-            )
+                chunk_rows = 0
+                for card in cards:
+                    dedupe_key = _card_key(card)
+                    if dedupe_key in seen:
+                        continue
 
-        if limit_chunks is not None and processed_chunks >= limit_chunks:
-            break
-        if range_exhausted:
-            break
+                    # Cards come from parse_cards_content (or the cache of its output),
+                    # so they are already validated.
+                    row = build_tsv_row_from_validated_card(
+                        card,
+                        deck=deck,
+                        card_id=f"{id_prefix}__{next_id:04d}",
+                    )
+                    next_id += 1
+                    seen_add(dedupe_key)
+                    out.write(row.encode("utf-8"))
+                    out.write(b"\n")
+                    row_count += 1
+                    chunk_rows += 1
+
+                label = _chunk_label([index for index, _chunk in batch], chunk_total)
+                print(
+                    f"Processed {txt_file.name} {label} -> {chunk_rows} card row(s)",
+                    file=sys.stderr,
+                )
 
+    # Rows are streamed to disk as they are accepted rather than joined at the end.
     output_file.parent.mkdir(parents=True, exist_ok=True)
-    content = "\n".join(HEADER_LINES + rows) + "\n"
-    output_file.write_text(content, encoding="utf-8")
-
-    return len(rows)
+    out = output_file.open("wb", buffering=1 << 20)
+    out.write(("\n".join(HEADER_LINES) + "\n").encode("utf-8"))
+    client = create_async_client(provider)
+    cache = PromptCache(cache_path) if cache_path is not None else None
+    # Identical chunks (repeated sections, retries) share one LLM call per run.
+    coalescer = CallCoalescer()
+    writer = asyncio.create_task(write(out))
+    stages = [asyncio.create_task(produce())]
+    stages.extend(asyncio.create_task(consume()) for _ in range(worker_count))
+    try:
+        await asyncio.gather(*stages)
+        await result_queue.put(None)
+        await writer
+    finally:
+        for task in [*stages, writer]:
+            task.cancel()
+        await close_async_client(client)
+        if cache is not None:
+            cache.close()
+        out.close()
+
+    return row_count
 
 
 def main() -> int:
     args = parse_args()
-    total = generate_anki_file(
-        input_dir=args.input_dir,
-        output_file=args.output_file,
-        model=args.model,
-        provider=args.provider,
-        deck=args.deck,
-        chunk_size=args.chunk_size,
-        overlap=args.overlap,
-        limit_chunks=args.limit_chunks,
-        chunk_range=args.chunk_range,
+    total = asyncio.run(
+        generate_anki_file(
+            input_dir=args.input_dir,
+            output_file=args.output_file,
+            model=args.model,
+            provider=args.provider,
+            deck=args.deck,
+            chunk_size=args.chunk_size,
+            overlap=args.overlap,
+            limit_chunks=args.limit_chunks,
+            chunk_range=args.chunk_range,
+            batch_chunks=args.batch_chunks,
+            cache_path=None if args.no_cache else args.cache_file,
+            min_chapter_chars=args.min_chapter_chars,
+            min_chunk_sentences=args.min_chunk_sentences,
+        )
     )
     print(f"Wrote {total} Anki row(s) to {args.output_file}")
     return 0
@@ -8,6 +8,14 @@ if str(PROJECT_ROOT) not in sys.path:
 
 from src.memory_map import ids, parser, utils
 
+# Deck, topic and tag values repeat across thousands of cards; keep one copy of each.
+_INTERNED: dict[str, str] = {}
+_SHARED_FIELDS = ("note_type", "deck", "topic", "tags")
+
+
+def _intern(value: str) -> str:
+    return _INTERNED.setdefault(value, value)
+
 
 def parse_args() -> argparse.Namespace:
     cli_parser = argparse.ArgumentParser(
@@ -39,9 +47,19 @@ def main() -> None:
         except ValueError:
             skipped_cards += 1
             continue
-        card["_id"] = ids.get_or_assign_id(card)
+        for field in _SHARED_FIELDS:
+            value = card.get(field)
+            if isinstance(value, str):
+                card[field] = _intern(value)
         cards.append(card)
 
+    # Same result as ids.get_or_assign_id per card, hashed in one bulk pass.
+    missing_ids = [card for card in cards if not str(card.get("id", "")).strip()]
+    for card, card_id in zip(missing_ids, ids.generate_card_ids_bulk(missing_ids)):
+        card["id"] = card_id
+    for card in cards:
+        card["_id"] = sys.intern(str(card["id"]).strip())
+
     print(f"Parsed {len(cards)} valid cards with stable IDs.")
     print(f"Skipped {skipped_cards} invalid cards.")
     print(f"Headers: {headers}")
@@ -11,11 +11,14 @@ Example:
 from __future__ import annotations
 
 import argparse
-import json
+import asyncio
 import datetime
 from pathlib import Path
 from typing import List
 
+import numpy as np
+import orjson
+
 from src.memory_map import parser as mm_parser
 from src.memory_map.embeddings import create_embedder
 
@@ -26,47 +29,72 @@ def main(argv: List[str] | None = None) -> int:
     ap.add_argument("--model", default="embeddinggemma:300m", help="Embedder model to use")
     ap.add_argument("--out-embeddings", required=True, help="Output JSON path for embeddings")
     ap.add_argument("--batch-size", type=int, default=64, help="Batch size for embedder calls")
+    ap.add_argument(
+        "--max-concurrency",
+        type=int,
+        default=8,
+        help="Maximum embedding batches in flight at once",
+    )
+    ap.add_argument(
+        "--format",
+        choices=["json", "npz"],
+        default="json",
+        help="json: single JSON file; npz: float16 matrix + ids in .npz with a .meta.json sidecar",
+    )
+    ap.add_argument(
+        "--mmap",
+        action=argparse.BooleanOptionalAction,
+        default=True,
+        help="Memory-map the input TSV instead of reading it through a buffered file (default: on)",
+    )
     args = ap.parse_args(argv)
 
-    headers, rows = mm_parser.read_tsv(args.input_tsv)
+    headers, rows = mm_parser.read_tsv(args.input_tsv, use_mmap=args.mmap)
     if not rows:
         print("No rows found in input TSV")
         return 1
 
     cards = [mm_parser.normalize_card(r) for r in rows]
 
-    ids: List[str] = []
-    texts: List[str] = []
-    for i, card in enumerate(cards):
-        cid = card.get("source_id") or card.get("id") or f"card_{i+1}"
-        ids.append(cid)
-        text = f"{card.get('question','')}\n{card.get('answer','')}"
-        texts.append(text)
+    ids: List[str] = [
+        card.get("source_id") or card.get("id") or f"card_{i+1}" for i, card in enumerate(cards)
+    ]
+    texts: List[str] = [f"{card['question']}\n{card['answer']}" for card in cards]
 
     embedder = create_embedder(model=args.model)
-    embeddings = embedder.embed_texts(texts, batch_size=args.batch_size)
-
-    # Ensure lists (in case of numpy arrays)
-    def _to_list(obj):
-        try:
-            return [float(x) for x in obj]
-        except Exception:
-            return list(obj)
-
-    embeddings_lists = [_to_list(e) for e in embeddings]
-
-    out = {
-        "ids": ids,
-        "embeddings": embeddings_lists,
-        "meta": {
-            "model": args.model,
-            "created_at": datetime.datetime.utcnow().isoformat() + "Z",
-        },
+    # Rows land directly in one preallocated float32 matrix.
+    embeddings = asyncio.run(
+        embedder.embed_matrix_async(
+            texts,
+            batch_size=args.batch_size,
+            max_concurrency=args.max_concurrency,
+        )
+    )
+
+    meta = {
+        "model": args.model,
+        "created_at": datetime.datetime.now(datetime.timezone.utc).isoformat().replace("+00:00", "Z"),
     }
 
     out_path = Path(args.out_embeddings)
     out_path.parent.mkdir(parents=True, exist_ok=True)
-    out_path.write_text(json.dumps(out, ensure_ascii=False))
+    if args.format == "npz":
+        # Binary matrix; embeddings tolerate float16, which halves the size again.
+        out_path = out_path.with_suffix(".npz")
+        np.savez(
+            out_path,
+            embeddings=embeddings.astype(np.float16),
+            ids=np.asarray(ids, dtype=str),
+        )
+        out_path.with_suffix(".meta.json").write_bytes(orjson.dumps(meta))
+    else:
+        # orjson serializes the contiguous float32 matrix natively without per-float boxing.
+        out = {
+            "ids": ids,
+            "embeddings": embeddings,
+            "meta": meta,
+        }
+        out_path.write_bytes(orjson.dumps(out, option=orjson.OPT_SERIALIZE_NUMPY))
     print(f"Wrote embeddings to {out_path}")
     return 0
 
@@ -26,7 +26,7 @@ def visualize_memory_map(
     seed: int = 42,
     out_plot: str | None = None,
 ) -> dict[str, Any]:
-    embeddings_payload = _load_embeddings_json(Path(in_embeddings))
+    embeddings_payload = _load_embeddings(Path(in_embeddings))
 
     embedding_ids = embeddings_payload["ids"]
     vectors = np.asarray(embeddings_payload["embeddings"], dtype=float)
@@ -104,7 +104,11 @@ def visualize_memory_map(
 
 def main(argv: list[str] | None = None) -> int:
     ap = argparse.ArgumentParser(description="Build k-NN graph and 2D visualization metadata")
-    ap.add_argument("--in-embeddings", required=True, help="Input embeddings JSON from Phase 2.1")
+    ap.add_argument(
+        "--in-embeddings",
+        required=True,
+        help="Input embeddings JSON (or .npz) from Phase 2.1",
+    )
     ap.add_argument("--input-tsv", required=True, help="Input Phase 1 TSV file")
     ap.add_argument("--k", type=int, default=6, help="Number of nearest neighbors per card")
     ap.add_argument("--layout", default="pca", choices=["pca", "umap"], help="Layout method")
@@ -128,6 +132,19 @@ def main(argv: list[str] | None = None) -> int:
     return 0
 
 
+def _load_embeddings(path: Path) -> dict[str, Any]:
+    if path.suffix == ".npz":
+        return _load_embeddings_npz(path)
+    return _load_embeddings_json(path)
+
+
+def _load_embeddings_npz(path: Path) -> dict[str, Any]:
+    with np.load(path, allow_pickle=False) as data:
+        if "ids" not in data or "embeddings" not in data:
+            raise ValueError("Embeddings file must contain 'ids' and 'embeddings'")
+        return {"ids": data["ids"].tolist(), "embeddings": data["embeddings"]}
+
+
 def _load_embeddings_json(path: Path) -> dict[str, Any]:
     raw_bytes = path.read_bytes()
 
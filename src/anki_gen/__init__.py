@@ -1,4 +1,4 @@
 from .json_processor import parse_cards_payload
-from .validator import extract_rows_from_cards
+from .validator import extract_rows_from_cards, iter_rows_from_cards
 
-__all__ = ["parse_cards_payload", "extract_rows_from_cards"]
\ No newline at end of file
+__all__ = ["parse_cards_payload", "extract_rows_from_cards", "iter_rows_from_cards"]
\ No newline at end of file
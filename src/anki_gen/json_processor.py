@@ -1,4 +1,56 @@
-import json
+import re
+
+import orjson
+
+# Only structural characters matter when matching brackets; the regex skips
+# everything else at C speed.
+_JSON_TOKEN_RE = re.compile(r'[{}\[\]"\\]')
+
+
+def _match_json_end(text: str, start: int) -> int | None:
+    """Return the index just past the bracket closing ``text[start]``.
+
+    Brackets inside JSON strings (including escaped quotes) are ignored.
+    """
+    depth = 0
+    in_string = False
+    escaped_index = -1
+    for match in _JSON_TOKEN_RE.finditer(text, start):
+        index = match.start()
+        if index == escaped_index:
+            continue
+        char = match.group()
+        if in_string:
+            if char == "\\":
+                escaped_index = index + 1
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "{[":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return index + 1
+    return None
+
+
+def _first_json_span(text: str) -> str | None:
+    first_curly = text.find("{")
+    first_bracket = text.find("[")
+
+    # An array is only preferred when it encloses the first object.
+    if first_bracket != -1 and (first_curly == -1 or first_bracket < first_curly):
+        end = _match_json_end(text, first_bracket)
+        if end is not None and (first_curly == -1 or end > first_curly):
+            return text[first_bracket:end]
+
+    if first_curly != -1:
+        end = _match_json_end(text, first_curly)
+        if end is not None:
+            return text[first_curly:end]
+    return None
 
 
 def extract_json_text(raw_response: str) -> str:
@@ -11,6 +63,11 @@ def extract_json_text(raw_response: str) -> str:
         if len(lines) >= 3 and lines[-1].strip().startswith("```"):
             text = "\n".join(lines[1:-1]).strip()
 
+    span = _first_json_span(text)
+    if span is not None:
+        return span
+
+    # Unbalanced output (e.g. truncated): fall back to the widest window.
     first_curly = text.find("{")
     last_curly = text.rfind("}")
     if first_curly != -1 and last_curly != -1 and last_curly > first_curly:
@@ -26,7 +83,7 @@ def extract_json_text(raw_response: str) -> str:
 
 def parse_cards_payload(raw_response: str) -> list[dict]:
     json_text = extract_json_text(raw_response)
-    parsed = json.loads(json_text)
+    parsed = orjson.loads(json_text)
 
     if isinstance(parsed, list):
         cards = parsed
@@ -1,50 +1,130 @@
+import asyncio
+import inspect
+import io
 import json
 import os
 import random
+from functools import lru_cache
 from typing import Any
 
+from src.anki_gen.schemas import (
+    BatchedCardsPayload,
+    CardsPayload,
+    get_cards_schema,
+    get_model_schema,
+)
+
+# The schemas never change at runtime, so build them (and their JSON text) once.
+_CARDS_SCHEMA = get_cards_schema()
+_CARDS_SCHEMA_JSON = json.dumps(_CARDS_SCHEMA, ensure_ascii=False)
+_BATCHED_CARDS_SCHEMA_JSON = json.dumps(
+    get_model_schema(BatchedCardsPayload),
+    ensure_ascii=False,
+)
+
+_CARD_KEYS = "cards, question, answer, options, explanation, topic, tags"
+_BATCHED_CARD_KEYS = "chunks, " + _CARD_KEYS
+
+_EXTRA_DISTRACTOR_RULE = (
+    "- When creating options, make at least one distractor (incorrect option) "
+    "longer or more detailed than the correct answer.\n"
+)
+
+# Shared preamble; identical bytes across calls so provider-side prompt caching can hit.
+_PROMPT_RULES_TEMPLATE = (
+    "You create high-quality MultipleChoice Anki cards from study text.  Prefer questions that will likely appear in AWS certification exams."
+    "Rules:\n"
+    "- Make the cards self-contained. Provide enough context so that question is answerable. IMPORTANT: Do not assume the learner has read the main block. If you need to reference the main block, include the relevant information from it in the question.\n"
+    "- Prefer scenario based questions that require applying knowledge, not just recalling facts. Avoid simple recall questions unless the fact is important.\n"
+    "- CONTEXT_BEFORE and CONTEXT_AFTER are for understanding only; do not create cards from info found only in context.\n"
+    "- options must have exactly 3 choices and include the answer.\n"
+    "- Do not make repetitive cards; cover different facts/concepts in each card.\n"
+    "- Avoid tells on distractors (e.g., the word 'only').\n"
+    "- In the explanation, briefly explain why the answer is correct and the other options are incorrect.\n"
+    "{extra_rule}"
+    "- Do not include any keys besides: {keys}.\n"
+    "- Follow this JSON schema exactly:\n"
+    "{schema}\n\n"
+)
+
+_PROMPT_BLOCKS_TEMPLATE = (
+    "CONTEXT_BEFORE:\n"
+    "{context_before}\n\n"
+    "MAIN_BLOCK:\n"
+    "{main_block}\n\n"
+    "CONTEXT_AFTER:\n"
+    "{context_after}"
+)
+
+
+def _render_rules(extra_rule: str, keys: str, schema: str) -> str:
+    return _PROMPT_RULES_TEMPLATE.format_map(
+        {"extra_rule": extra_rule, "keys": keys, "schema": schema}
+    )
+
+
+def _specialize_prompt_template(extra_rule: str) -> str:
+    # Bake the rules and schema in; braces from the schema JSON are escaped so
+    # only the three text-block placeholders survive.
+    rules = _render_rules(extra_rule, _CARD_KEYS, _CARDS_SCHEMA_JSON)
+    return rules.replace("{", "{{").replace("}", "}}") + _PROMPT_BLOCKS_TEMPLATE
+
+
+# One precompiled template per extra-rule variant, keyed by the rule text.
+_PROMPT_TEMPLATES = {
+    rule: _specialize_prompt_template(rule) for rule in ("", _EXTRA_DISTRACTOR_RULE)
+}
+_BATCHED_PROMPT_RULES = {
+    rule: _render_rules(rule, _BATCHED_CARD_KEYS, _BATCHED_CARDS_SCHEMA_JSON)
+    for rule in ("", _EXTRA_DISTRACTOR_RULE)
+}
+
 
 def make_prompt(
     main_block: str,
     context_before: str,
     context_after: str,
 ) -> str:
-    # Import here to avoid a circular import at module import time
-    from src.anki_gen.validator import CardsPayload
+    return _PROMPT_TEMPLATES[_pick_extra_rule()].format(
+        context_before=context_before,
+        main_block=main_block,
+        context_after=context_after,
+    )
+
+
+def make_batched_prompt(blocks: list[dict]) -> str:
+    """Build one prompt that asks for cards from several blocks at once.
 
-    schema_json = json.dumps(CardsPayload.model_json_schema(), ensure_ascii=False)
+    Each block carries ``main_block``, ``context_before`` and ``context_after``.
+    The response holds one ``chunks`` entry per block, in the same order.
+    """
+    sections = []
+    for index, block in enumerate(blocks, start=1):
+        sections.append(
+            f"CONTEXT_BEFORE_{index}:\n"
+            f"{block['context_before']}\n\n"
+            f"MAIN_BLOCK_{index}:\n"
+            f"{block['main_block']}\n\n"
+            f"CONTEXT_AFTER_{index}:\n"
+            f"{block['context_after']}"
+        )
+    return (
+        _BATCHED_PROMPT_RULES[_pick_extra_rule()]
+        + f"There are {len(blocks)} numbered blocks. Return exactly one entry in chunks "
+        "per MAIN_BLOCK, in order; CONTEXT_BEFORE_i and CONTEXT_AFTER_i belong to MAIN_BLOCK_i.\n\n"
+        + "\n\n".join(sections)
+    )
+
+
+def _pick_extra_rule() -> str:
     # 50% of the time, add an instruction asking the model to make a distractor
     # (an incorrect option) longer/more detailed than the correct answer.
-    extra_rule = ""
     try:
         if random.random() < 0.5:
-            extra_rule = (
-                "- When creating options, make at least one distractor (incorrect option) "
-                "longer or more detailed than the correct answer.\n"
-            )
+            return _EXTRA_DISTRACTOR_RULE
     except Exception:
-        extra_rule = ""
-    return (
-        "You create high-quality MultipleChoice Anki cards from study text.  Prefer questions that will likely appear in AWS certification exams."
-        "Rules:\n"
-        "- Make the cards self-contained. Provide enough context so that question is answerable. IMPORTANT: Do not assume the learner has read the main block. If you need to reference the main block, include the relevant information from it in the question.\n"
-        "- Prefer scenario based questions that require applying knowledge, not just recalling facts. Avoid simple recall questions unless the fact is important.\n"
-        "- CONTEXT_BEFORE and CONTEXT_AFTER are for understanding only; do not create cards from info found only in context.\n"
-        "- options must have exactly 3 choices and include the answer.\n"
-        "- Do not make repetitive cards; cover different facts/concepts in each card.\n"
-        "- Avoid tells on distractors (e.g., the word 'only').\n"
-        "- In the explanation, briefly explain why the answer is correct and the other options are incorrect.\n"
-        f"{extra_rule}"
-        "- Do not include any keys besides: cards, question, answer, options, explanation, topic, tags.\n"
-        "- Follow this JSON schema exactly:\n"
-        f"{schema_json}\n\n"
-        "CONTEXT_BEFORE:\n"
-        f"{context_before}\n\n"
-        "MAIN_BLOCK:\n"
-        f"{main_block}\n\n"
-        "CONTEXT_AFTER:\n"
-        f"{context_after}"
-    )
+        pass
+    return ""
 
 
 def call_ollama(prompt: str, model: str, think: Any = None, stream: bool = False) -> Any:
@@ -99,70 +179,283 @@ def call_llm(
     raise ValueError(f"Unsupported LLM provider: {provider}")
 
 
+async def call_llm_async(
+    prompt: str,
+    model: str,
+    provider: str = "ollama",
+    think: Any = None,
+    api_key: str | None = None,
+    client: Any = None,
+    response_model: Any = None,
+    stream: bool = False,
+) -> Any:
+    """Async counterpart of :func:`call_llm`.
+
+    Pass a ``client`` from :func:`create_async_client` to share one connection
+    pool across many concurrent calls. ``response_model`` overrides the
+    structured output schema (defaults to ``CardsPayload``). With ``stream``
+    the chunks are consumed with ``async for`` so other calls keep running
+    between tokens.
+    """
+    normalized_provider = provider.strip().lower()
+    if normalized_provider == "ollama":
+        return await _call_ollama_async(
+            prompt=prompt,
+            model=model,
+            think=think,
+            client=client,
+            response_model=response_model,
+            stream=stream,
+        )
+    if normalized_provider == "openai":
+        return await _call_openai_async(
+            prompt=prompt,
+            model=model,
+            api_key=api_key,
+            client=client,
+            response_model=response_model,
+            stream=stream,
+        )
+    raise ValueError(f"Unsupported LLM provider: {provider}")
+
+
+def create_async_client(provider: str, api_key: str | None = None) -> Any:
+    """Create an async client for ``provider`` to reuse across ``call_llm_async`` calls."""
+    normalized_provider = provider.strip().lower()
+    if normalized_provider == "ollama":
+        return _create_async_ollama_client()
+    if normalized_provider == "openai":
+        return _create_async_openai_client(api_key=_resolve_openai_api_key(api_key))
+    raise ValueError(f"Unsupported LLM provider: {provider}")
+
+
+async def close_async_client(client: Any) -> None:
+    """Close a client returned by :func:`create_async_client`."""
+    close = getattr(client, "close", None)
+    if close is None:
+        return
+    result = close()
+    if inspect.isawaitable(result):
+        await result
+
+
+async def generate_all(
+    prompts: list[str],
+    model: str,
+    provider: str = "ollama",
+    think: Any = None,
+    api_key: str | None = None,
+    max_concurrency: int = 8,
+) -> list[Any]:
+    """Run :func:`call_llm_async` for every prompt, at most ``max_concurrency`` at once.
+
+    Results are returned in the order of ``prompts``; all calls share one client.
+    """
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+    client = create_async_client(provider, api_key=api_key)
+
+    async def _call(prompt: str) -> Any:
+        async with sem:
+            return await call_llm_async(
+                prompt=prompt,
+                model=model,
+                provider=provider,
+                think=think,
+                api_key=api_key,
+                client=client,
+            )
+
+    try:
+        return await asyncio.gather(*(_call(prompt) for prompt in prompts))
+    finally:
+        await close_async_client(client)
+
+
+_RETRY_BASE_DELAY = 1.0
+
+
+def _backoff_delay(attempt: int) -> float:
+    # Exponential backoff with full jitter so retries from many calls spread out.
+    return _RETRY_BASE_DELAY * (2**attempt) * random.random()
+
+
+async def batch_call_openai(
+    prompts: list[str],
+    model: str,
+    max_concurrency: int = 10,
+    api_key: str | None = None,
+    max_retries: int = 3,
+    response_model: Any = None,
+) -> list[Any]:
+    """Send ``prompts`` to OpenAI concurrently over one client.
+
+    Chat Completions takes a single conversation per request, so this fans
+    the prompts out with at most ``max_concurrency`` in flight. Failed calls
+    (e.g. rate limits) are retried up to ``max_retries`` times with
+    exponential backoff. Results are aligned with ``prompts``. If a prompt
+    still fails, the remaining calls are cancelled and its error is raised.
+    """
+    sem = asyncio.Semaphore(max(1, max_concurrency))
+    client = create_async_client("openai", api_key=api_key)
+
+    async def _one(prompt: str) -> Any:
+        retries = max(0, max_retries)
+        for attempt in range(retries + 1):
+            try:
+                async with sem:
+                    return await _call_openai_async(
+                        prompt=prompt,
+                        model=model,
+                        client=client,
+                        response_model=response_model,
+                    )
+            except RuntimeError:
+                if attempt == retries:
+                    raise
+            # Back off outside the semaphore so waiting retries don't hold a slot.
+            await asyncio.sleep(_backoff_delay(attempt))
+
+    tasks = [asyncio.create_task(_one(prompt)) for prompt in prompts]
+    try:
+        return await asyncio.gather(*tasks)
+    finally:
+        # gather doesn't cancel the others when one fails; stop them before the
+        # shared client is closed under them.
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await close_async_client(client)
+
+
+# Sync clients are reused across calls so their HTTP connections stay alive.
+@lru_cache(maxsize=1)
 def _create_ollama_client() -> Any:
     from ollama import Client
 
     return Client()
 
 
+@lru_cache(maxsize=4)
 def _create_openai_client(api_key: str) -> Any:
     from openai import OpenAI
 
     return OpenAI(api_key=api_key)
 
 
+def _create_async_ollama_client() -> Any:
+    from ollama import AsyncClient
+
+    return AsyncClient()
+
+
+def _create_async_openai_client(api_key: str) -> Any:
+    from openai import AsyncOpenAI
+
+    return AsyncOpenAI(api_key=api_key)
+
+
+def _resolve_openai_api_key(api_key: str | None) -> str:
+    resolved_api_key = api_key or os.getenv("OPENAI_API_KEY")
+    if not resolved_api_key:
+        raise RuntimeError(
+            "OPENAI_API_KEY environment variable is required for OpenAI provider"
+        )
+    return resolved_api_key
+
+
+def _ollama_chat_params(
+    prompt: str,
+    model: str,
+    think: Any,
+    stream: bool,
+    response_model: Any = None,
+) -> dict:
+    params = {
+        "model": model,
+        "messages": [
+            {
+                "role": "user",
+                "content": prompt,
+            },
+        ],
+        "format": _CARDS_SCHEMA if response_model is None else get_model_schema(response_model),
+        "options": {"temperature": 0.2},
+        "stream": stream,
+    }
+    if think is not None:
+        params["think"] = think
+    return params
+
+
+def _ollama_chunk_done(chunk: Any) -> bool:
+    # The final streamed chunk carries done=True; stop without waiting for EOF.
+    if isinstance(chunk, dict):
+        return bool(chunk.get("done"))
+    return bool(getattr(chunk, "done", False))
+
+
+def _ollama_chunk_content(chunk: Any) -> str | None:
+    # Different client implementations may expose message as a dict-like or
+    # object; handle both. Chunks carrying only `thinking` have no content.
+    msg = None
+    try:
+        msg = chunk["message"]
+    except Exception:
+        msg = getattr(chunk, "message", None)
+
+    if not msg:
+        return None
+
+    try:
+        return msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", None)
+    except Exception:
+        return None
+
+
+def _openai_delta_content(chunk: Any) -> str | None:
+    choices = getattr(chunk, "choices", None)
+    if not choices:
+        return None
+    delta = getattr(choices[0], "delta", None)
+    if not delta:
+        return None
+    return getattr(delta, "content", None)
+
+
+def _openai_parsed_content(completion: Any) -> Any:
+    message = completion.choices[0].message
+
+    refusal = getattr(message, "refusal", None)
+    if refusal:
+        raise RuntimeError(f"OpenAI refused request: {refusal}")
+
+    parsed = getattr(message, "parsed", None)
+    if parsed is None:
+        raise RuntimeError("OpenAI response did not include parsed structured output")
+
+    return parsed.model_dump()
+
+
 def _call_ollama(prompt: str, model: str, think: Any = None, stream: bool = False) -> Any:
     """Call Ollama and return response content."""
-    # Import here to avoid circular imports at module import time
-    from src.anki_gen.validator import CardsPayload
-
     client = _create_ollama_client()
-    messages = [
-        {
-            "role": "user",
-            "content": prompt,
-        },
-    ]
     try:
-        params = {
-            "model": model,
-            "messages": messages,
-            "format": CardsPayload.model_json_schema(),
-            "options": {"temperature": 0.2},
-            "stream": stream,
-        }
-        if think is not None:
-            params["think"] = think
-
+        params = _ollama_chat_params(prompt=prompt, model=model, think=think, stream=stream)
         response = client.chat(**params)
 
         if stream:
             # Consume the stream but ignore `thinking` chunks; collect and
             # return the final assembled content string.
-            final_parts = []
+            buffer = io.StringIO()
             for chunk in response:
-                # Different client implementations may expose message as a
-                # dict-like or object; handle both.
-                msg = None
-                try:
-                    msg = chunk["message"]
-                except Exception:
-                    msg = getattr(chunk, "message", None)
-
-                if not msg:
-                    continue
-
-                # Extract content if present; some chunks may carry `thinking`.
-                content = None
-                try:
-                    content = msg.get("content") if isinstance(msg, dict) else getattr(msg, "content", None)
-                except Exception:
-                    content = None
-
+                content = _ollama_chunk_content(chunk)
                 if content:
-                    final_parts.append(content)
+                    buffer.write(content)
+
+                if _ollama_chunk_done(chunk):
+                    break
 
-            return "".join(final_parts)
+            return buffer.getvalue()
 
         return response["message"]["content"]
     except Exception as exc:
@@ -176,14 +469,7 @@ def _call_openai(
     api_key: str | None = None,
 ) -> Any:
     """Call OpenAI and return response content."""
-    # Import here to avoid circular imports at module import time
-    from src.anki_gen.validator import CardsPayload
-
-    resolved_api_key = api_key or os.getenv("OPENAI_API_KEY")
-    if not resolved_api_key:
-        raise RuntimeError(
-            "OPENAI_API_KEY environment variable is required for OpenAI provider"
-        )
+    resolved_api_key = _resolve_openai_api_key(api_key)
 
     client = _create_openai_client(api_key=resolved_api_key)
     messages = [
@@ -201,34 +487,104 @@ def _call_openai(
                 temperature=0.2,
                 stream=True,
             )
-            final_parts = []
+            buffer = io.StringIO()
             for chunk in response:
-                choices = getattr(chunk, "choices", None)
-                if not choices:
-                    continue
-                delta = getattr(choices[0], "delta", None)
-                if not delta:
-                    continue
-                content = getattr(delta, "content", None)
+                content = _openai_delta_content(chunk)
                 if content:
-                    final_parts.append(content)
-            return "".join(final_parts)
+                    buffer.write(content)
+            return buffer.getvalue()
 
         completion = client.chat.completions.parse(
             model=model,
             messages=messages,
             response_format=CardsPayload,
         )
-        message = completion.choices[0].message
+        return _openai_parsed_content(completion)
+    except Exception as exc:
+        raise RuntimeError(f"Failed to call OpenAI: {exc}") from exc
+
+
+async def _call_ollama_async(
+    prompt: str,
+    model: str,
+    think: Any = None,
+    client: Any = None,
+    response_model: Any = None,
+    stream: bool = False,
+) -> Any:
+    """Call Ollama through ``AsyncClient`` and return response content."""
+    if client is None:
+        client = _create_async_ollama_client()
+    try:
+        params = _ollama_chat_params(
+            prompt=prompt,
+            model=model,
+            think=think,
+            stream=stream,
+            response_model=response_model,
+        )
+        response = await client.chat(**params)
+
+        if stream:
+            buffer = io.StringIO()
+            async for chunk in response:
+                content = _ollama_chunk_content(chunk)
+                if content:
+                    buffer.write(content)
+
+                if _ollama_chunk_done(chunk):
+                    break
 
-        refusal = getattr(message, "refusal", None)
-        if refusal:
-            raise RuntimeError(f"OpenAI refused request: {refusal}")
+            return buffer.getvalue()
 
-        parsed = getattr(message, "parsed", None)
-        if parsed is None:
-            raise RuntimeError("OpenAI response did not include parsed structured output")
+        return response["message"]["content"]
+    except Exception as exc:
+        raise RuntimeError(f"Failed to call Ollama: {exc}") from exc
+
+
+async def _call_openai_async(
+    prompt: str,
+    model: str,
+    api_key: str | None = None,
+    client: Any = None,
+    response_model: Any = None,
+    stream: bool = False,
+) -> Any:
+    """Call OpenAI through ``AsyncOpenAI`` and return parsed structured output.
 
-        return parsed.model_dump()
+    With ``stream`` the raw streamed text is returned instead, like the sync path.
+    """
+    if response_model is None:
+        response_model = CardsPayload
+    if client is None:
+        client = _create_async_openai_client(api_key=_resolve_openai_api_key(api_key))
+    messages = [
+        {
+            "role": "user",
+            "content": prompt,
+        },
+    ]
+
+    try:
+        if stream:
+            response = await client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=0.2,
+                stream=True,
+            )
+            buffer = io.StringIO()
+            async for chunk in response:
+                content = _openai_delta_content(chunk)
+                if content:
+                    buffer.write(content)
+            return buffer.getvalue()
+
+        completion = await client.chat.completions.parse(
+            model=model,
+            messages=messages,
+            response_format=response_model,
+        )
+        return _openai_parsed_content(completion)
     except Exception as exc:
         raise RuntimeError(f"Failed to call OpenAI: {exc}") from exc
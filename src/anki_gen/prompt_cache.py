@@ -0,0 +1,100 @@
+"""Prompt -> cards caching for the Anki generator.
+
+``PromptCache`` persists results across runs; entries are keyed by a blake2b
+digest of the model name and the chunk text (see `chunk_cache_key`), so
+re-running the generator over unchanged text skips the LLM call entirely. ``CallCoalescer`` dedupes
+identical chunks within a run.
+"""
+
+import asyncio
+import hashlib
+import sqlite3
+from pathlib import Path
+from typing import Any, Awaitable, Callable
+
+import orjson
+
+
+def chunk_cache_key(model: str, blocks: list[dict]) -> str:
+    """Key for the cards generated from ``blocks`` by ``model``.
+
+    Built from each block's ``main_block``, ``context_before`` and
+    ``context_after`` rather than the rendered prompt, which varies between
+    runs because ``make_prompt`` adds its extra rule at random.
+    """
+    content = [
+        model,
+        [[block["main_block"], block["context_before"], block["context_after"]] for block in blocks],
+    ]
+    return hashlib.blake2b(orjson.dumps(content), digest_size=16).hexdigest()
+
+
+class PromptCache:
+    """SQLite-backed ``key -> cards`` store, keyed by `chunk_cache_key`."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS prompt_cache (key TEXT PRIMARY KEY, value BLOB NOT NULL)"
+        )
+
+    def get(self, key: str) -> list[dict] | None:
+        row = self._conn.execute(
+            "SELECT value FROM prompt_cache WHERE key = ?",
+            (key,),
+        ).fetchone()
+        if row is None:
+            return None
+        try:
+            cards = orjson.loads(row[0])
+        except orjson.JSONDecodeError:
+            return None
+        return cards if isinstance(cards, list) else None
+
+    def set(self, key: str, cards: list[dict]) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO prompt_cache (key, value) VALUES (?, ?)",
+            (key, orjson.dumps(cards)),
+        )
+
+    def close(self) -> None:
+        self._conn.close()
+
+    def __enter__(self) -> "PromptCache":
+        return self
+
+    def __exit__(self, *_exc_info) -> None:
+        self.close()
+
+
+class CallCoalescer:
+    """Single-flight wrapper: identical keys share one in-flight call.
+
+    Concurrent callers with the same key await the same task; successful
+    results are memoized for the rest of the run. Failures are not cached,
+    so each caller's retry issues a fresh call.
+    """
+
+    def __init__(self) -> None:
+        self._pending: dict[str, asyncio.Task] = {}
+        self._results: dict[str, Any] = {}
+
+    async def run(self, key: str, call: Callable[[], Awaitable[Any]]) -> Any:
+        if key in self._results:
+            return self._results[key]
+
+        task = self._pending.get(key)
+        if task is None:
+            task = asyncio.ensure_future(call())
+            self._pending[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        # shield: one cancelled waiter must not cancel the call for the others.
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        self._pending.pop(key, None)
+        if not task.cancelled() and task.exception() is None:
+            self._results[key] = task.result()
@@ -0,0 +1,101 @@
+"""Card models and Anki export constants shared by the generator entry points."""
+
+from functools import lru_cache
+from typing import TypedDict
+
+from pydantic import BaseModel, ConfigDict, RootModel, field_validator, model_validator
+
+
+HEADER_LINES = [
+    "#separator:tab",
+    "#html:true",
+    "#notetype column:1",
+    "#deck column:2",
+    "#tags column:14",
+]
+
+
+class AnkiCard(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    question: str
+    answer: str
+    options: list[str]
+    explanation: str
+    topic: str
+    tags: list[str] = []
+
+    @field_validator("question", "answer", "explanation", "topic")
+    @classmethod
+    def validate_text_fields(cls, value: str) -> str:
+        cleaned = value.strip()
+        if not cleaned:
+            raise ValueError("Field cannot be empty")
+        return cleaned
+
+    @field_validator("options")
+    @classmethod
+    def validate_options(cls, value: list[str]) -> list[str]:
+        options = [option.strip() for option in value if option.strip()]
+        if len(options) != 3:
+            raise ValueError("options must contain exactly 3 non-empty choices")
+        return options
+
+    @field_validator("tags")
+    @classmethod
+    def validate_tags(cls, value: list[str]) -> list[str]:
+        return [tag.strip() for tag in value if tag.strip()]
+
+    @model_validator(mode="after")
+    def validate_answer_is_option(self) -> "AnkiCard":
+        if self.answer in self.options:
+            return self
+
+        normalized_answer = self.answer.strip().lower()
+        for option in self.options:
+            if option.strip().lower() == normalized_answer:
+                self.answer = option
+                return self
+
+        raise ValueError("answer must be present in options")
+
+
+class AnkiCardTD(TypedDict):
+    """Plain-dict shape of a validated ``AnkiCard`` as returned by the parsers."""
+
+    question: str
+    answer: str
+    options: list[str]
+    explanation: str
+    topic: str
+    tags: list[str]
+
+
+class CardsPayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    cards: list[AnkiCard]
+
+
+class CardsList(RootModel[list[AnkiCard]]):
+    pass
+
+
+class BatchedCardsPayload(BaseModel):
+    model_config = ConfigDict(extra="forbid")
+
+    chunks: list[CardsPayload]
+
+
+@lru_cache(maxsize=None)
+def get_model_schema(model: type[BaseModel]) -> dict:
+    """JSON schema for a pydantic model, built once per process per model.
+
+    Callers share the returned dict and must not mutate it.
+    """
+    return model.model_json_schema()
+
+
+def get_cards_schema() -> dict:
+    """JSON schema for ``CardsPayload``."""
+    return get_model_schema(CardsPayload)
@@ -0,0 +1,35 @@
+import pytest
+
+from src.anki_gen.json_processor import extract_json_text, parse_cards_payload
+
+
+def test_extract_json_text_ignores_braces_inside_strings_and_trailing_prose():
+    raw = 'Here you go: {"cards": [{"question": "Why } and \\" here?"}]} Hope this helps {:}'
+
+    assert extract_json_text(raw) == '{"cards": [{"question": "Why } and \\" here?"}]}'
+
+
+def test_extract_json_text_prefers_enclosing_array_over_inner_object():
+    raw = 'Result:\n[{"question": "a"}, {"question": "b"}]\nDone.'
+
+    assert extract_json_text(raw) == '[{"question": "a"}, {"question": "b"}]'
+
+
+def test_extract_json_text_skips_leading_bracket_prose_before_object():
+    raw = 'See [1] for details. {"cards": []}'
+
+    assert extract_json_text(raw) == '{"cards": []}'
+
+
+def test_extract_json_text_strips_code_fence_and_falls_back_when_unbalanced():
+    assert extract_json_text('```json\n{"cards": []}\n```') == '{"cards": []}'
+    assert extract_json_text('{"cards": [ } trailing') == '{"cards": [ }'
+
+
+def test_extract_json_text_rejects_text_without_json():
+    with pytest.raises(ValueError):
+        extract_json_text("no json here")
+
+
+def test_parse_cards_payload_returns_card_dicts():
+    assert parse_cards_payload('{"cards": [{"question": "q"}, 1]}') == [{"question": "q"}]
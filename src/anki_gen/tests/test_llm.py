@@ -1,3 +1,4 @@
+import asyncio
 import os
 from types import SimpleNamespace
 
@@ -59,6 +60,157 @@ def test_call_ollama_stream_joins_only_content_chunks(monkeypatch):
     assert client.last_kwargs["stream"] is True
 
 
+def test_call_ollama_stream_stops_at_done_chunk(monkeypatch):
+    stream_response = [
+        {"message": {"content": "final"}, "done": True},
+        {"message": {"content": " ignored"}},
+    ]
+    client = FakeOllamaClient(stream_response)
+    monkeypatch.setattr(llm, "_create_ollama_client", lambda: client)
+
+    assert llm.call_ollama(prompt="hello", model="m", stream=True) == "final"
+
+
+class FakeAsyncOllamaClient:
+    def __init__(self, response):
+        self.response = response
+        self.last_kwargs = None
+
+    async def chat(self, **kwargs):
+        self.last_kwargs = kwargs
+        return self.response
+
+
+def test_call_llm_async_ollama_uses_given_client():
+    client = FakeAsyncOllamaClient({"message": {"content": "async-result"}})
+
+    result = asyncio.run(
+        llm.call_llm_async(
+            prompt="hello",
+            model="gpt-oss:120b-cloud",
+            provider="ollama",
+            think="medium",
+            client=client,
+        )
+    )
+
+    assert result == "async-result"
+    assert client.last_kwargs["think"] == "medium"
+    assert client.last_kwargs["stream"] is False
+    assert client.last_kwargs["messages"] == [{"role": "user", "content": "hello"}]
+
+
+def test_call_llm_async_ollama_stream_joins_content_until_done():
+    async def _stream():
+        yield {"message": {"thinking": "hmm"}}
+        yield {"message": {"content": "Hello "}}
+        yield {"message": {"content": "world"}, "done": True}
+        yield {"message": {"content": "ignored"}}
+
+    class StreamingClient:
+        async def chat(self, **kwargs):
+            self.last_kwargs = kwargs
+            return _stream()
+
+    client = StreamingClient()
+
+    result = asyncio.run(
+        llm.call_llm_async(prompt="p", model="m", provider="ollama", client=client, stream=True)
+    )
+
+    assert result == "Hello world"
+    assert client.last_kwargs["stream"] is True
+
+
+def test_generate_all_returns_results_in_prompt_order(monkeypatch):
+    class EchoAsyncClient:
+        closed = False
+
+        async def chat(self, **kwargs):
+            prompt = kwargs["messages"][0]["content"]
+            await asyncio.sleep(0.01 if prompt == "p0" else 0)
+            return {"message": {"content": prompt.upper()}}
+
+        async def close(self):
+            self.closed = True
+
+    client = EchoAsyncClient()
+    monkeypatch.setattr(llm, "_create_async_ollama_client", lambda: client)
+
+    results = asyncio.run(llm.generate_all(["p0", "p1", "p2"], model="m", max_concurrency=2))
+
+    assert results == ["P0", "P1", "P2"]
+    assert client.closed is True
+
+
+def test_batch_call_openai_retries_and_keeps_prompt_order(monkeypatch):
+    class FakeCompletions:
+        def __init__(self):
+            self.failed_once = False
+
+        async def parse(self, model, messages, response_format):
+            prompt = messages[0]["content"]
+            if prompt == "p1" and not self.failed_once:
+                self.failed_once = True
+                raise RuntimeError("rate limited")
+            await asyncio.sleep(0.01 if prompt == "p0" else 0)
+            parsed = SimpleNamespace(model_dump=lambda: {"prompt": prompt})
+            return SimpleNamespace(
+                choices=[SimpleNamespace(message=SimpleNamespace(refusal=None, parsed=parsed))]
+            )
+
+    class FakeAsyncOpenAI:
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=FakeCompletions())
+            self.closed = False
+
+        async def close(self):
+            self.closed = True
+
+    client = FakeAsyncOpenAI()
+    monkeypatch.setattr(llm, "_create_async_openai_client", lambda api_key: client)
+    monkeypatch.setattr(llm, "_RETRY_BASE_DELAY", 0)
+
+    results = asyncio.run(
+        llm.batch_call_openai(["p0", "p1", "p2"], model="m", max_concurrency=2, api_key="k")
+    )
+
+    assert results == [{"prompt": "p0"}, {"prompt": "p1"}, {"prompt": "p2"}]
+    assert client.chat.completions.failed_once is True
+    assert client.closed is True
+
+
+def test_batch_call_openai_cancels_pending_calls_before_closing_client(monkeypatch):
+    events = []
+
+    class FakeCompletions:
+        async def parse(self, model, messages, response_format):
+            prompt = messages[0]["content"]
+            events.append(f"call {prompt}")
+            if prompt == "bad":
+                raise RuntimeError("rate limited")
+            try:
+                await asyncio.sleep(1)
+            except asyncio.CancelledError:
+                events.append(f"cancelled {prompt}")
+                raise
+
+    class FakeAsyncOpenAI:
+        def __init__(self):
+            self.chat = SimpleNamespace(completions=FakeCompletions())
+
+        async def close(self):
+            events.append("close")
+
+    monkeypatch.setattr(llm, "_create_async_openai_client", lambda api_key: FakeAsyncOpenAI())
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(llm.batch_call_openai(["slow", "bad"], model="m", api_key="k", max_retries=0))
+
+    # max_retries=0 still makes one attempt, and "slow" stops before the client closes.
+    assert events == ["call slow", "call bad", "cancelled slow", "close"]
+
+
 def test_call_openai_uses_real_client_and_env_key():
     api_key = os.getenv("OPENAI_API_KEY")
     if not api_key:
@@ -94,3 +246,31 @@ def test_call_openai_uses_real_client_and_env_key():
 def test_call_llm_rejects_unknown_provider():
     with pytest.raises(ValueError, match="Unsupported LLM provider"):
         llm.call_llm(prompt="p", model="m", provider="unknown")
+
+
+def test_sync_ollama_client_is_reused_across_calls():
+    pytest.importorskip("ollama")
+    llm._create_ollama_client.cache_clear()
+
+    assert llm._create_ollama_client() is llm._create_ollama_client()
+
+
+def test_ollama_chat_params_reuse_cached_schema_for_response_model():
+    first = llm._ollama_chat_params("p", "m", None, False, response_model=llm.BatchedCardsPayload)
+    second = llm._ollama_chat_params("p", "m", None, False, response_model=llm.BatchedCardsPayload)
+
+    assert first["format"] is second["format"]
+    assert "chunks" in first["format"]["properties"]
+
+
+@pytest.mark.parametrize("extra_rule", ["", llm._EXTRA_DISTRACTOR_RULE])
+def test_make_prompt_keeps_schema_and_literal_braces(monkeypatch, extra_rule):
+    monkeypatch.setattr(llm, "_pick_extra_rule", lambda: extra_rule)
+
+    prompt = llm.make_prompt("main {x}", "before {", "} after")
+
+    assert llm._CARDS_SCHEMA_JSON in prompt
+    assert extra_rule in prompt
+    assert prompt.endswith(
+        "CONTEXT_BEFORE:\nbefore {\n\nMAIN_BLOCK:\nmain {x}\n\nCONTEXT_AFTER:\n} after"
+    )
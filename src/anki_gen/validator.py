@@ -1,136 +1,227 @@
-import json
 import re
-from typing import List
-
-from pydantic import (
-	BaseModel,
-	ConfigDict,
-	RootModel,
-	ValidationError,
-	field_validator,
-	model_validator,
-)
+import string
+from typing import Iterable, Iterator, List
+
+import orjson
+from pydantic import ValidationError
 
 from src.anki_gen.json_processor import extract_json_text
+from src.anki_gen.schemas import (
+	AnkiCard,
+	AnkiCardTD,
+	BatchedCardsPayload,
+	CardsList,
+	CardsPayload,
+)
+
+
+_TAG_ALLOWED = frozenset(string.ascii_letters + string.digits + "_:-")
+# Deletes every disallowed ASCII character; whitespace is already joined by then.
+_TAG_ASCII_DELETE = str.maketrans({chr(code): None for code in range(128) if chr(code) not in _TAG_ALLOWED})
+_TAG_DISALLOWED_RE = re.compile(r"[^a-zA-Z0-9_:-]")
 
 
 def sanitize_tag(value: str) -> str:
-	cleaned = re.sub(r"\s+", "_", value.strip())
-	cleaned = re.sub(r"[^a-zA-Z0-9_:-]", "", cleaned)
-	return cleaned
+	cleaned = "_".join(value.split())
+	if cleaned.isascii():
+		return cleaned.translate(_TAG_ASCII_DELETE)
+	return _TAG_DISALLOWED_RE.sub("", cleaned)
 
 
 def build_tsv_row_from_card(card: dict, deck: str) -> str:
-	note_type = str(card.get("note_type", "")).strip()
+	get = card.get
+	note_type = str(get("note_type", "")).strip()
 	if note_type and note_type != "MultipleChoice":
 		raise ValueError("Only MultipleChoice is supported")
 
-	row = [""] * 14
-	row[0] = "MultipleChoice"
-	row[1] = deck
-
-	raw_tags = card.get("tags", [])
-	tags: list[str] = []
-	if isinstance(raw_tags, list):
-		tags = [sanitize_tag(str(tag)) for tag in raw_tags if str(tag).strip()]
-
-	id = str(card.get("id", "")).strip()		
-	question = str(card.get("question", "")).strip()
-	answer = str(card.get("answer", "")).strip()
-	options = card.get("options", [])
-	explanation = str(card.get("explanation", "")).strip()
-	topic = str(card.get("topic", "")).strip()
-
+	# Validate the required fields before doing any formatting work.
+	question = str(get("question", "")).strip()
+	answer = str(get("answer", "")).strip()
+	options = get("options", [])
 	if not question or not answer or not isinstance(options, list) or len(options) != 3:
 		raise ValueError("Invalid MultipleChoice card fields")
 
-	options_text = [str(option).strip() for option in options if str(option).strip()]
+	options_text = [text for text in (str(option).strip() for option in options) if text]
 	if len(options_text) != 3 or answer not in options_text:
 		raise ValueError("MultipleChoice options must be 3 and include answer")
-	row[2] = id
-	row[3] = question
-	row[4] = answer
-	row[5] = json.dumps(options_text, ensure_ascii=False)
-	row[6] = explanation
-	row[7] = topic
-
-	row[13] = " ".join(tag for tag in tags if tag)
-	return "\t".join(row)
 
-
-def extract_rows_from_cards(cards: list[dict], deck: str) -> list[str]:
-	rows: list[str] = []
+	raw_tags = get("tags", [])
+	tags = ""
+	if isinstance(raw_tags, list):
+		tags = " ".join(
+			tag for tag in (sanitize_tag(str(raw_tag)) for raw_tag in raw_tags if str(raw_tag).strip()) if tag
+		)
+
+	return "\t".join(
+		(
+			"MultipleChoice",
+			deck,
+			str(get("id", "")).strip(),
+			question,
+			answer,
+			orjson.dumps(options_text).decode("utf-8"),
+			str(get("explanation", "")).strip(),
+			str(get("topic", "")).strip(),
+			"",
+			"",
+			"",
+			"",
+			"",
+			tags,
+		)
+	)
+
+
+def build_tsv_row_from_validated_card(card: AnkiCardTD, deck: str, card_id: str = "") -> str:
+	"""Format a card returned by ``parse_cards_content``.
+
+	The parser has already stripped the fields and checked the options, so
+	only tag sanitizing and the options JSON are left to do.
+	"""
+	tags = " ".join(tag for tag in (sanitize_tag(raw_tag) for raw_tag in card["tags"]) if tag)
+	return "\t".join(
+		(
+			"MultipleChoice",
+			deck,
+			card_id,
+			card["question"],
+			card["answer"],
+			orjson.dumps(card["options"]).decode("utf-8"),
+			card["explanation"],
+			card["topic"],
+			"",
+			"",
+			"",
+			"",
+			"",
+			tags,
+		)
+	)
+
+
+def iter_rows_from_cards(cards: Iterable[dict], deck: str) -> Iterator[str]:
+	"""Yield one TSV row per valid card, skipping invalid ones."""
 	for card in cards:
 		try:
-			rows.append(build_tsv_row_from_card(card, deck=deck))
+			yield build_tsv_row_from_card(card, deck=deck)
 		except ValueError:
 			continue
-	return rows
-
-
-class AnkiCard(BaseModel):
-	model_config = ConfigDict(extra="forbid")
-
-	question: str
-	answer: str
-	options: list[str]
-	explanation: str
-	topic: str
-	tags: list[str] = []
 
-	@field_validator("question", "answer", "explanation", "topic")
-	@classmethod
-	def validate_text_fields(cls, value: str) -> str:
-		cleaned = value.strip()
-		if not cleaned:
-			raise ValueError("Field cannot be empty")
-		return cleaned
 
-	@field_validator("options")
-	@classmethod
-	def validate_options(cls, value: list[str]) -> list[str]:
-		options = [option.strip() for option in value if option.strip()]
-		if len(options) != 3:
-			raise ValueError("options must contain exactly 3 non-empty choices")
-		return options
-
-	@field_validator("tags")
-	@classmethod
-	def validate_tags(cls, value: list[str]) -> list[str]:
-		return [tag.strip() for tag in value if tag.strip()]
-
-	@model_validator(mode="after")
-	def validate_answer_is_option(self) -> "AnkiCard":
-		if self.answer in self.options:
-			return self
+def extract_rows_from_cards(cards: list[dict], deck: str) -> list[str]:
+	return list(iter_rows_from_cards(cards, deck))
 
-		normalized_answer = self.answer.strip().lower()
-		for option in self.options:
-			if option.strip().lower() == normalized_answer:
-				self.answer = option
-				return self
 
-		raise ValueError("answer must be present in options")
+_CARD_TEXT_FIELDS = ("question", "answer", "explanation", "topic")
+_CARD_FIELDS = frozenset((*_CARD_TEXT_FIELDS, "options", "tags"))
 
 
-class CardsPayload(BaseModel):
-	model_config = ConfigDict(extra="forbid")
+def _is_str_list(value: object) -> bool:
+	return type(value) is list and all(type(item) is str for item in value)
 
-	cards: list[AnkiCard]
 
+def _finalize_card(card: object) -> AnkiCardTD | None:
+	"""Apply AnkiCard's validation rules to a plain dict.
 
-class CardsList(RootModel[list[AnkiCard]]):
-	pass
+	Returns None whenever the card is not clearly valid so the caller can fall
+	back to pydantic, which then produces the real error.
+	"""
+	if type(card) is not dict or not _CARD_FIELDS.issuperset(card):
+		return None
 
+	text: dict[str, str] = {}
+	for field in _CARD_TEXT_FIELDS:
+		value = card.get(field)
+		if type(value) is not str:
+			return None
+		value = value.strip()
+		if not value:
+			return None
+		text[field] = value
 
-def parse_cards_content(content: object) -> list[dict]:
+	raw_options = card.get("options")
+	raw_tags = card.get("tags", [])
+	if not _is_str_list(raw_options) or not _is_str_list(raw_tags):
+		return None
+	options = [option.strip() for option in raw_options if option.strip()]
+	if len(options) != 3:
+		return None
+
+	answer = text["answer"]
+	if answer not in options:
+		normalized_answer = answer.lower()
+		for option in options:
+			if option.lower() == normalized_answer:
+				answer = option
+				break
+		else:
+			return None
+
+	return {
+		"question": text["question"],
+		"answer": answer,
+		"options": options,
+		"explanation": text["explanation"],
+		"topic": text["topic"],
+		"tags": [tag.strip() for tag in raw_tags if tag.strip()],
+	}
+
+
+def _finalize_cards(cards: object) -> list[AnkiCardTD] | None:
+	if type(cards) is not list:
+		return None
+	finalized = []
+	for card in cards:
+		result = _finalize_card(card)
+		if result is None:
+			return None
+		finalized.append(result)
+	return finalized
+
+
+def _finalize_payload(payload: object) -> list[AnkiCardTD] | None:
+	if type(payload) is not dict or payload.keys() != {"cards"}:
+		return None
+	return _finalize_cards(payload["cards"])
+
+
+def _cards_from_object(content: dict) -> list[AnkiCardTD]:
+	if "chunks" in content:
+		chunks = content["chunks"]
+		if content.keys() == {"chunks"} and type(chunks) is list:
+			cards: list[AnkiCardTD] = []
+			for chunk in chunks:
+				chunk_cards = _finalize_payload(chunk)
+				if chunk_cards is None:
+					break
+				cards.extend(chunk_cards)
+			else:
+				return cards
+		batched = BatchedCardsPayload.model_validate(content)
+		return [card for chunk in batched.model_dump()["chunks"] for card in chunk["cards"]]
+
+	# Schema-constrained responses almost always pass the plain-dict checks;
+	# pydantic only runs for the odd card that does not.
+	cards = _finalize_payload(content)
+	if cards is not None:
+		return cards
+	payload = CardsPayload.model_validate(content)
+	return payload.model_dump()["cards"]
+
+
+def _cards_from_list(content: list) -> list[AnkiCardTD]:
+	cards = _finalize_cards(content)
+	if cards is not None:
+		return cards
+	return CardsList.model_validate(content).model_dump()
+
+
+def parse_cards_content(content: object) -> list[AnkiCardTD]:
 	if isinstance(content, dict):
-		payload = CardsPayload.model_validate(content)
-		return [card.model_dump() for card in payload.cards]
+		return _cards_from_object(content)
 
 	if isinstance(content, list):
-		payload = CardsList.model_validate(content)
-		return [card.model_dump() for card in payload.root]
+		return _cards_from_list(content)
 
 	if not isinstance(content, str):
 		raise ValueError("Ollama response content must be a string, list, or dict")
@@ -138,20 +229,18 @@ def parse_cards_content(content: object) -> list[dict]:
 	raw_text = content.strip()
 	if raw_text.startswith("{") or raw_text.startswith("["):
 		try:
-			parsed = json.loads(raw_text)
-		except json.JSONDecodeError:
+			parsed = orjson.loads(raw_text)
+		except orjson.JSONDecodeError:
 			parsed = None
 		if isinstance(parsed, dict):
-			payload = CardsPayload.model_validate(parsed)
-			return [card.model_dump() for card in payload.cards]
+			return _cards_from_object(parsed)
 		if isinstance(parsed, list):
-			payload = CardsList.model_validate(parsed)
-			return [card.model_dump() for card in payload.root]
+			return _cards_from_list(parsed)
 
 	json_text = extract_json_text(content)
 	try:
 		payload = CardsPayload.model_validate_json(json_text)
-		return [card.model_dump() for card in payload.cards]
+		return payload.model_dump()["cards"]
 	except ValidationError:
 		payload = CardsList.model_validate_json(json_text)
-		return [card.model_dump() for card in payload.root]
\ No newline at end of file
+		return payload.model_dump()
\ No newline at end of file
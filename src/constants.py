@@ -1,7 +1,15 @@
+import os
+
 SAMPLE_RATE = 24000
 VOICE = "af_heart"
 SPEED = 1.2
 STATE_FILE = ".tts_reader_state.json"
+CHAPTER_CACHE_DIR = ".tts_reader_cache"  # Extracted EPUB assets + parsed chapter JSON
+MAX_CACHED_BOOKS = 5  # Books kept in CHAPTER_CACHE_DIR; least recently opened are removed
+TTS_AUDIO_CACHE_DIR = os.path.expanduser("~/.cache/myTts/tts")  # Synthesized chapter audio
+TTS_AUDIO_CACHE = not os.environ.get("MYTTS_NO_TTS_CACHE")  # Set MYTTS_NO_TTS_CACHE=1 to disable
+TTS_AUDIO_CACHE_MAX_BYTES = 2 * 1024**3  # Least recently played audio is removed past this size
+PREFETCH_CHAPTERS = False  # Parse every chapter on a background thread pool after loading
 BLOCK_SIZE = 1024
 MS_PER_CHAR_BASE = 25  # Baseline ms per character; adjusted by SPEED
 VOLUME = 1.5  # Multiplier applied to generated audio (1.0 = no change)
@@ -1,27 +1,62 @@
-import json
+import bisect
+import hashlib
+import html
 import os
+import posixpath
 import re
 import shutil
 import sys
-import tempfile
 import threading
 import traceback
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 
-from bs4 import BeautifulSoup
-from ebooklib import epub, ITEM_DOCUMENT
-from kokoro import KPipeline
+import numpy as np
+import orjson
+import lxml.html
 from PySide6 import QtCore, QtWidgets
-from PySide6.QtCore import QUrl, Signal
+from PySide6.QtCore import QFile, QIODevice, QUrl, Signal
+from PySide6.QtWebChannel import QWebChannel
+from PySide6.QtWebEngineCore import QWebEngineScript
 from PySide6.QtWebEngineWidgets import QWebEngineView
 
-from .constants import MS_PER_CHAR_BASE, SPEED
-from .epub_view.reader_injection import build_reader_script
+from .constants import CHAPTER_CACHE_DIR, MAX_CACHED_BOOKS, MS_PER_CHAR_BASE, PREFETCH_CHAPTERS, SPEED
+from .epub_view.epub_package import DOCUMENT_MEDIA_TYPES, read_package
+from .epub_view.reader_bridge import ReaderBridge
+from .epub_view.reader_injection import build_bridge_script, build_reader_script
 from .logger import get_logger
 from .tts.player import TtsPlayer
 from .state import ReaderState
 
 logger = get_logger(__name__)
 
+_WRAP_CHAPTER_JS = (
+    "if (window.wrapChapterFromBridge) {{ "
+    "window.wrapChapterFromBridge({index});"
+    " }} else {{ console.warn('wrapChapterFromBridge not available'); }}"
+)
+# Every <body> text node outside script/style, in document order. <head> is
+# excluded so <title> is neither spoken nor counted as sentence 0.
+_BODY_TEXT_XPATH = "//body//text()[not(ancestor::script or ancestor::style)]"
+_parser_local = threading.local()
+# Bump when the cached chapter JSON changes meaning, so older entries miss.
+_CHAPTER_CACHE_VERSION = 3
+_FIRST_HEADER_RE = re.compile(rb"<h[1-3](?:\s[^>]*)?>(.*?)</h[1-3]\s*>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]*>")
+_BODY_START_RE = re.compile(rb"<body[\s>]", re.IGNORECASE)
+# Markup that contributes no spoken text: script/style blocks, comments and tags.
+_NON_TEXT_RE = re.compile(rb"<(script|style)\b.*?</\1\s*>|<!--.*?-->|<[^>]*>", re.IGNORECASE | re.DOTALL)
+# Milliseconds per character in 16.16 fixed point, so offsets stay integer math.
+_MS_PER_CHAR_Q16 = int(MS_PER_CHAR_BASE / SPEED * 65536)
+# Floor for re-arming the highlight timer so a stalled offset can't spin it.
+_MIN_HIGHLIGHT_DELAY_MS = 20
+# Re-check interval while playing but no sentence boundary is known yet.
+_HIGHLIGHT_RETRY_MS = 100
+# Split on sentence-ending punctuation followed by whitespace or end of string.
+_SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+")
+# Any whitespace run containing a line break (every separator str.splitlines knows).
+_LINE_BREAK_RUN_RE = re.compile(r"\s*[\n\r\v\f\x1c-\x1e\x85\u2028\u2029]\s*")
+
 
 class EpubReaderApp(QtWidgets.QMainWindow):
     status_changed = Signal(str)
@@ -31,21 +66,34 @@ class EpubReaderApp(QtWidgets.QMainWindow):
     def __init__(self):
         super().__init__()
         self.setWindowTitle("EPUB Reader + Kokoro TTS")
-        self.pipeline = KPipeline(lang_code="a")
+        # Kokoro weights are loaded on first playback, off the UI thread.
+        self.pipeline = None
+        self._pipeline_lock = threading.Lock()
         self.state = ReaderState()
         self.state.load()
-        self.player = TtsPlayer(self.pipeline)
+        self.player = TtsPlayer(self.pipeline, audio_cache=True)
         self.player.on_state = self._on_player_state
         self.chapters = []
         self.book_dir = None
+        self._chapter_cache_file = None
         self.current_chapter_idx = -1
         self.last_sentence_idx = -1
         self._update_highlight_log_count = 0
+        # The injected reader script is identical for every chapter; build it once.
+        self._reader_script = build_reader_script()
         
-        # Timer for updating highlight during playback
+        # Timer for updating highlight during playback; each tick re-arms it for
+        # the next sentence boundary instead of polling.
         self.highlight_timer = QtCore.QTimer()
+        self.highlight_timer.setSingleShot(True)
         self.highlight_timer.timeout.connect(self._update_highlight)
 
+        # State writes are debounced: rapid chapter switches coalesce into one save.
+        self._save_timer = QtCore.QTimer(self)
+        self._save_timer.setSingleShot(True)
+        self._save_timer.setInterval(500)
+        self._save_timer.timeout.connect(self.state.save)
+
         self._build_ui()
         self._wire_signals()
         self._load_saved_book()
@@ -74,6 +122,7 @@ class EpubReaderApp(QtWidgets.QMainWindow):
         self.chapter_list = QtWidgets.QListWidget()
         self.chapter_list.setMinimumWidth(220)
         self.web_view = QWebEngineView()
+        self._setup_web_channel()
         splitter.addWidget(self.chapter_list)
         splitter.addWidget(self.web_view)
         splitter.setStretchFactor(0, 0)
@@ -94,10 +143,37 @@ class EpubReaderApp(QtWidgets.QMainWindow):
         self.chapter_list.currentRowChanged.connect(self._show_chapter)
         self.web_view.loadFinished.connect(self._apply_reader_styles)
 
+    def _setup_web_channel(self):
+        """Expose chapter data to page JavaScript through a QWebChannel `ttsBridge` object."""
+        page = self.web_view.page()
+        self.bridge = ReaderBridge(self._bridge_chapter, parent=self)
+        self.channel = QWebChannel(page)
+        self.channel.registerObject("ttsBridge", self.bridge)
+        page.setWebChannel(self.channel)
+
+        qwebchannel_file = QFile(":/qtwebchannel/qwebchannel.js")
+        qwebchannel_file.open(QIODevice.ReadOnly)
+        qwebchannel_js = bytes(qwebchannel_file.readAll()).decode("utf-8")
+        qwebchannel_file.close()
+
+        script = QWebEngineScript()
+        script.setName("tts-bridge")
+        script.setSourceCode(build_bridge_script(qwebchannel_js))
+        script.setInjectionPoint(QWebEngineScript.DocumentCreation)
+        script.setWorldId(QWebEngineScript.MainWorld)
+        script.setRunsOnSubFrames(False)
+        page.scripts().insert(script)
+
+    def _bridge_chapter(self, index):
+        if 0 <= index < len(self.chapters):
+            return self._ensure_chapter_parsed(index)
+        return None
+
     def _wire_signals(self):
         self.status_changed.connect(self._set_status)
         self.error_message.connect(self._show_error)
         self.controls_changed.connect(self._update_controls)
+        self.controls_changed.connect(self._sync_highlight_timer)
 
     def _set_status(self, message):
         self.status.setText(message)
@@ -105,6 +181,12 @@ class EpubReaderApp(QtWidgets.QMainWindow):
     def _on_player_state(self):
         self.controls_changed.emit()
 
+    def _sync_highlight_timer(self):
+        # Playback begins on a worker thread, seconds later when Kokoro is still
+        # loading, so arm the timer once the player reports it is playing.
+        if self.player.is_playing and not self.player.is_paused and not self.highlight_timer.isActive():
+            self.highlight_timer.start(100)  # First update; later ones follow sentence boundaries
+
     def _update_controls(self):
         if self.player.is_playing and not self.player.is_paused:
             self.play_button.setEnabled(False)
@@ -146,7 +228,12 @@ class EpubReaderApp(QtWidgets.QMainWindow):
 
     def _load_epub(self, path):
         try:
-            self.chapters = self._extract_chapters(path)
+            chapters = self._load_chapter_cache(path)
+            if chapters is None:
+                chapters = self._extract_chapters(path)
+            self.chapters = chapters
+            self._save_chapter_cache()
+            self._prune_chapter_cache(os.path.abspath(CHAPTER_CACHE_DIR), self._chapter_cache_key(path))
         except Exception as exc:
             print("EPUB load failed:", file=sys.stderr)
             traceback.print_exc()
@@ -155,9 +242,11 @@ class EpubReaderApp(QtWidgets.QMainWindow):
         self.state.book_path = path
         self.state.chapter_index = 0
         self.state.offset_ms = 0
-        self.state.save()
+        self._save_timer.start()
         self._refresh_chapter_list()
         self._show_chapter(0)
+        if PREFETCH_CHAPTERS:
+            self._prefetch_chapters()
         self._set_status(f"Loaded: {os.path.basename(path)}")
 
     def _refresh_chapter_list(self):
@@ -170,14 +259,14 @@ class EpubReaderApp(QtWidgets.QMainWindow):
     def _show_chapter(self, index):
         if index is None or index < 0 or index >= len(self.chapters):
             return
-        chapter = self.chapters[index]
+        chapter = self._ensure_chapter_parsed(index)
         self.current_chapter_idx = index
         logger.info(f"Showing chapter {index}: {chapter['title']}")
         logger.debug(f"Chapter has {len(chapter.get('sentences', []))} sentences, {len(chapter.get('sentence_offsets', []))} offsets")
         self.web_view.setUrl(QUrl.fromLocalFile(chapter["html_path"]))
         self.state.chapter_index = index
         self.state.offset_ms = 0
-        self.state.save()
+        self._save_timer.start()
         self.player.stop()
         self._set_status(f"Selected: {chapter['title']}")
 
@@ -186,27 +275,19 @@ class EpubReaderApp(QtWidgets.QMainWindow):
             logger.warning("Web view failed to load")
             return
         logger.info(f"Web view loaded (ok={ok}), applying reader styles")
-        script = build_reader_script()
-        self.web_view.page().runJavaScript(script, self._wrap_sentences_for_current_chapter)
+        self.web_view.page().runJavaScript(self._reader_script, self._wrap_sentences_for_current_chapter)
 
     def _wrap_sentences_for_current_chapter(self, _result=None):
         if 0 <= self.current_chapter_idx < len(self.chapters):
-            chapter = self.chapters[self.current_chapter_idx]
+            chapter = self._ensure_chapter_parsed(self.current_chapter_idx)
             sentences = chapter.get("sentences", [])
-            char_positions = chapter.get("char_positions", [])
             logger.debug(f"Applying reader styles for chapter {self.current_chapter_idx}")
             logger.debug(f"Found {len(sentences)} sentences in chapter")
             if sentences:
-                sentences_json = json.dumps(sentences)
-                char_positions_json = json.dumps(char_positions)
                 logger.debug(f"Calling wrapSentences with {len(sentences)} sentences")
                 logger.debug(f"First 3 sentences: {sentences[:3]}")
-                logger.debug(f"First 3 char positions: {char_positions[:3]}")
-                js = (
-                    "if (window.wrapSentences) { "
-                    f"window.wrapSentences({sentences_json}, {char_positions_json});"
-                    " } else { console.warn('wrapSentences not available'); }"
-                )
+                # The page pulls sentences and positions over the web channel.
+                js = _WRAP_CHAPTER_JS.format(index=self.current_chapter_idx)
                 self.web_view.page().runJavaScript(js)
                 QtCore.QTimer.singleShot(500, self._log_console_messages)
             else:
@@ -242,21 +323,24 @@ class EpubReaderApp(QtWidgets.QMainWindow):
         # Get current chapter and playback offset
         idx = self.chapter_list.currentRow()
         if idx < 0 or idx >= len(self.chapters):
+            # The timer is single-shot; keep polling until a chapter is current.
+            self.highlight_timer.start(_HIGHLIGHT_RETRY_MS)
             return
         
         chapter = self.chapters[idx]
         if "sentence_offsets" not in chapter:
+            self.highlight_timer.start(_HIGHLIGHT_RETRY_MS)
             return
         
         offset_ms = self.player.get_offset_ms()
         offsets = chapter["sentence_offsets"]
         
-        # Find which sentence we're currently in
-        sentence_idx = -1
-        for i in range(len(offsets) - 1):
-            if offsets[i] <= offset_ms < offsets[i + 1]:
-                sentence_idx = i
-                break
+        # Find which sentence we're currently in: offsets is sorted, so binary search
+        # for the last start <= offset_ms. Past the final boundary there is none.
+        next_boundary = bisect.bisect_right(offsets, offset_ms)
+        sentence_idx = next_boundary - 1
+        if sentence_idx >= len(offsets) - 1:
+            sentence_idx = -1
         
         # Log periodically to avoid spam
         self._update_highlight_log_count += 1
@@ -271,18 +355,29 @@ class EpubReaderApp(QtWidgets.QMainWindow):
             logger.debug(f"Executing JS: {js_code}")
             self.web_view.page().runJavaScript(js_code)
 
+        # Wake up again when the next sentence is due; past the last one there is nothing left to highlight.
+        if next_boundary < len(offsets):
+            delay_ms = offsets[next_boundary] - offset_ms
+            self.highlight_timer.start(max(delay_ms, _MIN_HIGHLIGHT_DELAY_MS))
+
     def play_selected(self):
         index = self.chapter_list.currentRow()
         if index < 0 or index >= len(self.chapters):
             QtWidgets.QMessageBox.information(self, "Select Chapter", "Pick a chapter first.")
             return
-        chapter = self.chapters[index]
+        chapter = self._ensure_chapter_parsed(index)
+        if not chapter["text"]:
+            QtWidgets.QMessageBox.information(self, "Empty Chapter", "This chapter has no readable text.")
+            return
         self._set_status(f"Synthesizing: {chapter['title']}")
         QtCore.QTimer.singleShot(50, lambda: self._start_playback(chapter["text"], chapter["title"]))
 
     def _start_playback(self, text, title):
         def worker():
             try:
+                # Cached chapter audio plays without loading Kokoro at all.
+                if not self.player.has_cached_audio(text):
+                    self._ensure_pipeline()
                 self.player.load_text(text)
                 self.player.offset_ms = self.state.offset_ms
                 self.player.play()
@@ -296,16 +391,23 @@ class EpubReaderApp(QtWidgets.QMainWindow):
                 # Stop timer if playback failed
                 self.highlight_timer.stop()
 
+        # The highlight timer is started by _sync_highlight_timer once playback begins.
         threading.Thread(target=worker, daemon=True).start()
-        # Start the highlight timer from the main thread (not from worker)
-        logger.info(f"Starting highlight timer")
-        self.highlight_timer.start(100)  # Update every 100ms
+
+    def _ensure_pipeline(self):
+        with self._pipeline_lock:
+            if self.pipeline is None:
+                from kokoro import KPipeline
+
+                logger.info("Loading Kokoro pipeline")
+                self.pipeline = KPipeline(lang_code="a")
+                self.player.pipeline = self.pipeline
 
     def pause(self):
         self.player.pause()
         self.highlight_timer.stop()
         self.state.offset_ms = self.player.get_offset_ms()
-        self.state.save()
+        self._save_timer.start()
         self._set_status("Paused")
 
     def resume(self):
@@ -317,7 +419,7 @@ class EpubReaderApp(QtWidgets.QMainWindow):
         self.highlight_timer.stop()
         self.player.stop()
         self.state.offset_ms = 0
-        self.state.save()
+        self._save_timer.start()
         self.last_sentence_idx = -1
         # Clear highlight
         self.web_view.page().runJavaScript("if (window.setTtsHighlight) { window.setTtsHighlight(-1); }")
@@ -325,21 +427,92 @@ class EpubReaderApp(QtWidgets.QMainWindow):
 
     def closeEvent(self, event):
         self.state.offset_ms = self.player.get_offset_ms()
+        self._save_timer.stop()
         self.state.save()
         self.player.stop()
-        self._cleanup_book_dir()
+        # Persist the chapters parsed during this session for the next launch.
+        self._save_chapter_cache()
         event.accept()
 
-    def _cleanup_book_dir(self):
-        if self.book_dir and os.path.isdir(self.book_dir):
-            shutil.rmtree(self.book_dir, ignore_errors=True)
-        self.book_dir = None
+    @staticmethod
+    def _chapter_cache_key(path):
+        stat = os.stat(path)
+        raw = f"{_CHAPTER_CACHE_VERSION}\0{os.path.abspath(path)}\0{stat.st_mtime_ns}\0{stat.st_size}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def _load_chapter_cache(self, path):
+        """Return cached chapters for `path`, or None when the book changed or was never cached.
+
+        The cache holds the chapter list as JSON next to the extracted assets
+        directory, both keyed by path, mtime and size.
+        """
+        key = self._chapter_cache_key(path)
+        cache_root = os.path.abspath(CHAPTER_CACHE_DIR)
+        cache_file = os.path.join(cache_root, f"{key}.json")
+        book_dir = os.path.join(cache_root, key)
+        if not (os.path.isfile(cache_file) and os.path.isdir(book_dir)):
+            return None
+        try:
+            with open(cache_file, "rb") as handle:
+                chapters = orjson.loads(handle.read())
+        except (OSError, orjson.JSONDecodeError):
+            return None
+        self.book_dir = book_dir
+        self._chapter_cache_file = cache_file
+        logger.info(f"Loaded {len(chapters)} chapters from cache")
+        return chapters
+
+    def _save_chapter_cache(self):
+        if not self._chapter_cache_file or not self.chapters:
+            return
+        # Write to a sibling temp file and swap it in, so a crash mid-write can't
+        # leave a truncated cache that would fail to load next launch.
+        temp_file = f"{self._chapter_cache_file}.tmp"
+        try:
+            with open(temp_file, "wb") as handle:
+                handle.write(orjson.dumps(self.chapters))
+            os.replace(temp_file, self._chapter_cache_file)
+        except OSError:
+            logger.warning(f"Could not write chapter cache {self._chapter_cache_file}")
+
+    @staticmethod
+    def _prune_chapter_cache(cache_root, current_key):
+        """Delete cached books beyond the MAX_CACHED_BOOKS most recently opened.
+
+        Recency is the newest mtime of a book's `<key>.json` and `<key>/`;
+        the JSON is rewritten on every open. Entries orphaned by an EPUB whose
+        mtime or size changed age out the same way.
+        """
+        try:
+            names = os.listdir(cache_root)
+        except OSError:
+            return
+        last_used = {}
+        for name in names:
+            key = name.split(".", 1)[0]
+            if key == current_key:
+                continue
+            try:
+                mtime = os.stat(os.path.join(cache_root, name)).st_mtime
+            except OSError:
+                continue
+            last_used[key] = max(mtime, last_used.get(key, 0.0))
+        # The current book takes one of the slots.
+        keep = max(MAX_CACHED_BOOKS - 1, 0)
+        for key in sorted(last_used, key=last_used.get, reverse=True)[keep:]:
+            shutil.rmtree(os.path.join(cache_root, key), ignore_errors=True)
+            for suffix in (".json", ".json.tmp"):
+                try:
+                    os.remove(os.path.join(cache_root, f"{key}{suffix}"))
+                except FileNotFoundError:
+                    pass
+                except OSError:
+                    logger.warning(f"Could not remove cached book {key}{suffix}")
 
     @staticmethod
     def _split_sentences(text):
         """Split text into sentences using simple heuristics."""
-        # Split on sentence-ending punctuation followed by whitespace or end of string.
-        sentences = re.split(r'(?<=[.!?])\s+', text)
+        sentences = _SENTENCE_SPLIT_RE.split(text)
         result = [s.strip() for s in sentences if s.strip()]
         logger.debug(f"Split text into {len(result)} sentences")
         if result:
@@ -348,90 +521,159 @@ class EpubReaderApp(QtWidgets.QMainWindow):
 
     @staticmethod
     def _compute_sentence_offsets(sentences):
-        """Compute cumulative ms offset for each sentence based on character count and sentence positions."""
-        offsets = [0]
-        ms_per_char = MS_PER_CHAR_BASE / SPEED
-        cumulative_ms = 0
-        
-        # Also track character positions for DOM wrapping
-        char_positions = [0]
-        char_pos = 0
-        for sentence in sentences:
-            char_pos += len(sentence) + 1  # +1 for space between sentences
-            char_positions.append(char_pos)
-            
-            sentence_duration = len(sentence) * ms_per_char
-            cumulative_ms += sentence_duration
-            offsets.append(int(cumulative_ms))
-        
-        logger.debug(f"Computed offsets for {len(sentences)} sentences. MS per char: {ms_per_char}")
+        """Compute cumulative ms offset for each sentence based on character count."""
+        lens = np.fromiter((len(sentence) for sentence in sentences), dtype=np.int64, count=len(sentences))
+        offsets = [0] + ((np.cumsum(lens) * _MS_PER_CHAR_Q16) >> 16).tolist()
+
+        logger.debug(f"Computed offsets for {len(sentences)} sentences. MS per char: {_MS_PER_CHAR_Q16 / 65536}")
         logger.debug(f"Sample offsets: {offsets[:min(3, len(offsets))]}")
-        logger.debug(f"Char positions: {char_positions[:min(3, len(char_positions))]}")
-        return offsets, char_positions[:-1]  # Return offsets and start positions
+        return offsets
 
     def _extract_chapters(self, path):
-        book = epub.read_epub(path)
-        self._cleanup_book_dir()
-        self.book_dir = tempfile.mkdtemp(prefix="epub_reader_")
-        self._extract_items(book, self.book_dir)
-        items_by_id = {item.id: item for item in book.get_items()}
+        key = self._chapter_cache_key(path)
+        cache_root = os.path.abspath(CHAPTER_CACHE_DIR)
+        # Assets live next to the chapter cache so a warm cache can reuse them.
+        self.book_dir = os.path.join(cache_root, key)
+        self._chapter_cache_file = os.path.join(cache_root, f"{key}.json")
+        shutil.rmtree(self.book_dir, ignore_errors=True)
+        os.makedirs(self.book_dir)
+        # Only container.xml and the OPF are parsed up front; everything else is
+        # streamed out of the archive without being held in memory.
+        with zipfile.ZipFile(path) as archive:
+            opf_dir, manifest, spine = read_package(archive)
+            self._extract_items(archive, [member for member, _ in manifest.values()], self.book_dir)
         chapters = []
-        for spine_id, _linear in book.spine:
-            item = items_by_id.get(spine_id)
-            if not item or item.get_type() != ITEM_DOCUMENT:
+        for spine_id in spine:
+            member, media_type = manifest.get(spine_id, (None, None))
+            if media_type not in DOCUMENT_MEDIA_TYPES:
+                continue
+            html_path = os.path.join(self.book_dir, member)
+            if not os.path.isfile(html_path):
+                continue
+            # Only the title is needed up front; the body text, sentences and
+            # offsets are computed by _ensure_chapter_parsed on first use.
+            # The original HTML is already extracted by _extract_items
+            # We don't modify it to avoid breaking styles and namespaces
+            with open(html_path, "rb") as handle:
+                content = handle.read()
+            if not self._has_body_text(content):
+                # Cover images, blank separators: nothing to read or highlight.
                 continue
-            soup = BeautifulSoup(item.get_content(), "html.parser")
-            title = self._chapter_title(soup, item.get_name())
-            text = self._chapter_text(soup)
-            if text.strip():
-                html_path = os.path.join(self.book_dir, item.get_name())
-                sentences = self._split_sentences(text)
-                sentence_offsets, char_positions = self._compute_sentence_offsets(sentences)
-                
-                logger.info(f"Extracted chapter: {title} with {len(sentences)} sentences")
-                
-                # The original HTML is already extracted by _extract_items
-                # We don't modify it to avoid breaking styles and namespaces
-                
-                chapters.append({
-                    "title": title,
-                    "text": text,
-                    "html_path": html_path,
-                    "sentences": sentences,
-                    "sentence_offsets": sentence_offsets,
-                    "char_positions": char_positions,
-                })
+            chapters.append({
+                "title": self._quick_title(content, posixpath.relpath(member, opf_dir or ".")),
+                "html_path": html_path,
+                "_parsed": False,
+            })
         if not chapters:
             raise ValueError("No readable chapters found.")
-        logger.info(f"Extracted total {len(chapters)} chapters")
+        logger.info(f"Found {len(chapters)} chapters")
         return chapters
 
-    def _extract_items(self, book, target_dir):
-        for item in book.get_items():
-            name = item.get_name()
-            if not name:
+    def _ensure_chapter_parsed(self, index):
+        """Parse chapter `index` on first access and memoize the results on its dict."""
+        chapter = self.chapters[index]
+        if chapter["_parsed"]:
+            return chapter
+        chapter.update(self._parse_chapter_file(chapter["html_path"]))
+        logger.info(f"Parsed chapter: {chapter['title']} with {len(chapter['sentences'])} sentences")
+        return chapter
+
+    def _prefetch_chapters(self):
+        """Parse all remaining chapters on a thread pool in the background."""
+        pending = [chapter for chapter in self.chapters if not chapter["_parsed"]]
+        if not pending:
+            return
+
+        def worker():
+            with ThreadPoolExecutor(max_workers=os.cpu_count()) as executor:
+                parsed_chapters = executor.map(
+                    self._parse_chapter_file,
+                    [chapter["html_path"] for chapter in pending],
+                )
+                for chapter, parsed in zip(pending, parsed_chapters):
+                    # The UI may have parsed it in the meantime; either result is identical.
+                    if not chapter["_parsed"]:
+                        chapter.update(parsed)
+            logger.info(f"Prefetched {len(pending)} chapters")
+
+        threading.Thread(target=worker, daemon=True).start()
+
+    @classmethod
+    def _parse_chapter_file(cls, html_path):
+        # Read the body back from the extracted copy so cached stubs need no open book.
+        with open(html_path, "rb") as handle:
+            tree = cls._parse_html(handle.read())
+        text = cls._chapter_text(tree)
+        sentences = cls._split_sentences(text) if text.strip() else []
+        sentence_offsets = cls._compute_sentence_offsets(sentences)
+        return {
+            "text": text,
+            "sentences": sentences,
+            "sentence_offsets": sentence_offsets,
+            "_parsed": True,
+        }
+
+    def _extract_items(self, archive, members, target_dir):
+        # Stream members straight out of the archive in 64 KiB blocks rather than
+        # writing whole item buffers.
+        for name in members:
+            if name.startswith(("/", "../")) or name == "..":
+                logger.warning(f"Skipping EPUB item outside the archive root: {name}")
+                continue
+            try:
+                source = archive.open(name)
+            except KeyError:
+                logger.warning(f"EPUB manifest item missing from archive: {name}")
                 continue
             dest = os.path.join(target_dir, name)
             os.makedirs(os.path.dirname(dest), exist_ok=True)
-            with open(dest, "wb") as handle:
-                handle.write(item.get_content())
+            with source, open(dest, "wb") as handle:
+                shutil.copyfileobj(source, handle, length=1 << 16)
+
+    @staticmethod
+    def _parse_html(content):
+        """Parse chapter bytes with this thread's reusable lxml parser; None for empty documents."""
+        parser = getattr(_parser_local, "parser", None)
+        if parser is None:
+            # lxml parsers can't be shared across threads (prefetch), so keep one per thread.
+            # EPUB XHTML is UTF-8; without this, undeclared documents would decode as Latin-1.
+            parser = _parser_local.parser = lxml.html.HTMLParser(encoding="utf-8")
+        try:
+            return lxml.html.document_fromstring(content, parser=parser)
+        except lxml.etree.ParserError:
+            return None
 
     @staticmethod
-    def _chapter_title(soup, fallback):
-        if soup.title and soup.title.string:
-            return soup.title.string.strip()
-        header = soup.find(["h1", "h2", "h3"])
-        if header and header.get_text(strip=True):
-            return header.get_text(strip=True)
+    def _quick_title(content, fallback):
+        """Chapter-list title from the raw bytes, without an HTML parse.
+
+        Uses the first h1-h3 and ignores <title>, matching the titles the earlier
+        ebooklib-based loader produced (it dropped <head> when re-serializing).
+        """
+        match = _FIRST_HEADER_RE.search(content or b"")
+        if match:
+            inner = html.unescape(match.group(1).decode("utf-8", errors="replace"))
+            value = "".join(part.strip() for part in _TAG_RE.split(inner))
+            if value:
+                return value
         return fallback or "Untitled"
 
     @staticmethod
-    def _chapter_text(soup):
-        for script in soup(["script", "style"]):
-            script.decompose()
-        text = soup.get_text(separator="\n")
-        lines = [line.strip() for line in text.splitlines()]
-        return "\n".join(line for line in lines if line)
+    def _has_body_text(content):
+        """Whether the <body> of raw chapter bytes holds any text, without an HTML parse."""
+        match = _BODY_START_RE.search(content or b"")
+        body = content[match.start():] if match else (content or b"")
+        text = _NON_TEXT_RE.sub(b" ", body).decode("utf-8", errors="replace")
+        return bool(html.unescape(text).strip())
+
+    @staticmethod
+    def _chapter_text(tree):
+        if tree is None:
+            return ""
+        # Text nodes joined by newlines, like BeautifulSoup's get_text(separator="\n").
+        text = "\n".join(tree.xpath(_BODY_TEXT_XPATH))
+        # Same as stripping every line and dropping blank ones, in one C-level pass.
+        return _LINE_BREAK_RUN_RE.sub("\n", text).strip()
 
     def _show_error(self, title, message):
         QtWidgets.QMessageBox.critical(self, title, message)
@@ -0,0 +1,49 @@
+"""Read an EPUB's manifest and spine straight from the zip archive.
+
+Only META-INF/container.xml and the OPF are parsed; chapter documents and
+assets stay in the archive until the caller streams them out.
+"""
+import posixpath
+import zipfile
+from urllib.parse import unquote
+
+from lxml import etree
+
+CONTAINER_PATH = "META-INF/container.xml"
+DOCUMENT_MEDIA_TYPES = frozenset({"application/xhtml+xml", "text/html"})
+
+
+def read_package(archive: zipfile.ZipFile) -> tuple[str, dict[str, tuple[str, str]], list[str]]:
+    """Return ``(opf_dir, manifest, spine)`` for an open EPUB archive.
+
+    ``manifest`` maps item id to ``(member name, media type)``, with member
+    names resolved against the OPF directory; ``spine`` lists item ids in
+    reading order. The EPUB 3 navigation document is left out of the spine,
+    as ebooklib did, so it never shows up as a chapter.
+    """
+    container = etree.fromstring(archive.read(CONTAINER_PATH))
+    rootfile = container.find("{*}rootfiles/{*}rootfile")
+    if rootfile is None or not rootfile.get("full-path"):
+        raise ValueError("EPUB container.xml does not name an OPF package file.")
+    opf_path = rootfile.get("full-path")
+    opf_dir = posixpath.dirname(opf_path)
+    package = etree.fromstring(archive.read(opf_path))
+
+    manifest = {}
+    nav_ids = set()
+    for item in package.iterfind("{*}manifest/{*}item"):
+        item_id = item.get("id")
+        href = item.get("href")
+        if not item_id or not href:
+            continue
+        member = posixpath.normpath(posixpath.join(opf_dir, unquote(href)))
+        manifest[item_id] = (member, item.get("media-type", ""))
+        if "nav" in item.get("properties", "").split():
+            nav_ids.add(item_id)
+
+    spine = [
+        itemref.get("idref")
+        for itemref in package.iterfind("{*}spine/{*}itemref")
+        if itemref.get("idref") and itemref.get("idref") not in nav_ids
+    ]
+    return opf_dir, manifest, spine
@@ -0,0 +1,20 @@
+from PySide6.QtCore import QObject, Slot
+
+
+class ReaderBridge(QObject):
+    """QWebChannel object that hands chapter sentence data to the page's JavaScript.
+
+    `get_chapter(index)` returns the parsed chapter dict, or None for an
+    invalid index. Lists cross the channel as QVariantList, so nothing is
+    serialized into JavaScript source.
+    """
+
+    def __init__(self, get_chapter, parent=None):
+        super().__init__(parent)
+        self._get_chapter = get_chapter
+
+    @Slot(int, int, int, result=list)
+    def sentence_slice(self, index, start, count):
+        """Return up to `count` sentences of chapter `index` starting at `start`."""
+        chapter = self._get_chapter(index)
+        return chapter["sentences"][start : start + count] if chapter else []
@@ -1,3 +1,7 @@
+# Sentences fetched and wrapped per step, so the page can paint between steps.
+WRAP_CHUNK_SIZE = 256
+
+
 def reader_css():
     return (
         "img { max-width: 100% !important; height: auto !important; } "
@@ -35,22 +39,25 @@ def build_reader_script(css=None):
         "      }"
         "    }"
         "  };"
-        "  window.wrapSentences = function(sentences, charPositions) {"
-        "    if (!sentences || sentences.length === 0) { console.log('wrapSentences: no sentences'); return; }"
+        "  window.wrapSentencesBegin = function() {"
+        "    var walker = document.createTreeWalker(document.body, NodeFilter.SHOW_TEXT, null, false);"
+        "    var textNodes = [];"
+        "    var node;"
+        "    while (node = walker.nextNode()) {"
+        "      if (node.nodeValue && node.nodeValue.trim()) textNodes.push(node);"
+        "    }"
+        "    console.log('Found', textNodes.length, 'text nodes');"
+        "    var fullText = '';"
+        "    for (var tn of textNodes) fullText += tn.nodeValue;"
+        "    console.log('Full DOM text length:', fullText.length);"
+        "    window.ttsWrapState = {textNodes: textNodes, fullText: fullText, wrappedCount: 0};"
+        "  };"
+        "  window.wrapSentencesAppend = function(sentences, baseIndex) {"
+        "    var state = window.ttsWrapState;"
+        "    if (!state) { console.warn('wrapSentencesAppend called before wrapSentencesBegin'); return; }"
         "    try {"
-        "      console.log('wrapSentences called with', sentences.length, 'sentences');"
-        "      var body = document.body;"
-        "      var walker = document.createTreeWalker(body, NodeFilter.SHOW_TEXT, null, false);"
-        "      var textNodes = [];"
-        "      var node;"
-        "      while (node = walker.nextNode()) {"
-        "        if (node.nodeValue && node.nodeValue.trim()) textNodes.push(node);"
-        "      }"
-        "      console.log('Found', textNodes.length, 'text nodes');"
-        "      var wrappedCount = 0;"
-        "      var fullText = '';"
-        "      for (var tn of textNodes) fullText += tn.nodeValue;"
-        "      console.log('Full DOM text length:', fullText.length);"
+        "      var textNodes = state.textNodes;"
+        "      var fullText = state.fullText;"
         "      for (var s = 0; s < sentences.length; s++) {"
         "        var sentence = sentences[s].trim();"
         "        if (!sentence) continue;"
@@ -72,13 +79,13 @@ def build_reader_script(css=None):
         "                var after = tn.nodeValue.substring(relEnd);"
         "                var parent = tn.parentNode;"
         "                var span = document.createElement('span');"
-        "                span.setAttribute('data-tts-idx', s);"
+        "                span.setAttribute('data-tts-idx', baseIndex + s);"
         "                span.textContent = during;"
         "                if (before) parent.insertBefore(document.createTextNode(before), tn);"
         "                parent.insertBefore(span, tn);"
         "                if (after) parent.insertBefore(document.createTextNode(after), tn);"
         "                parent.removeChild(tn);"
-        "                wrappedCount++;"
+        "                state.wrappedCount++;"
         "                break;"
         "              }"
         "            }"
@@ -87,11 +94,35 @@ def build_reader_script(css=None):
         "          fullText = fullText.substring(0, idx) + ' '.repeat(sentenceLen) + fullText.substring(idx + sentenceLen);"
         "        }"
         "      }"
-        "      console.log('Successfully wrapped', wrappedCount, 'sentences');"
+        "      state.fullText = fullText;"
         "    } catch (e) {"
         "      console.error('Error wrapping sentences:', e.message, e.stack);"
         "    }"
         "  };"
+        "  window.wrapSentences = function(sentences) {"
+        "    if (!sentences || sentences.length === 0) { console.log('wrapSentences: no sentences'); return; }"
+        "    console.log('wrapSentences called with', sentences.length, 'sentences');"
+        "    window.wrapSentencesBegin();"
+        "    window.wrapSentencesAppend(sentences, 0);"
+        "    console.log('Successfully wrapped', window.ttsWrapState.wrappedCount, 'sentences');"
+        "  };"
+        "  window.wrapChapterFromBridge = function(chapterIdx) {"
+        "    if (!window.ttsBridgeReady) { console.warn('ttsBridge not available'); return; }"
+        "    window.ttsBridgeReady.then(function(bridge) {"
+        "      window.wrapSentencesBegin();"
+        "      var step = function(start) {"
+        f"        bridge.sentence_slice(chapterIdx, start, {WRAP_CHUNK_SIZE}, function(sentences) {{"
+        "          if (!sentences || sentences.length === 0) {"
+        "            console.log('Successfully wrapped', window.ttsWrapState.wrappedCount, 'sentences');"
+        "            return;"
+        "          }"
+        "          window.wrapSentencesAppend(sentences, start);"
+        "          setTimeout(function() { step(start + sentences.length); }, 0);"
+        "        });"
+        "      };"
+        "      step(0);"
+        "    });"
+        "  };"
         "  window.consoleMessages = [];"
         "  var origLog = console.log;"
         "  var origWarn = console.warn;"
@@ -110,3 +141,16 @@ def build_reader_script(css=None):
         "  };"
         "})();"
     )
+
+
+def build_bridge_script(qwebchannel_js):
+    """Return qwebchannel.js plus a `window.ttsBridgeReady` promise for the `ttsBridge` object."""
+    return qwebchannel_js + (
+        "\n(function() {"
+        "  window.ttsBridgeReady = new Promise(function(resolve) {"
+        "    new QWebChannel(qt.webChannelTransport, function(channel) {"
+        "      resolve(channel.objects.ttsBridge);"
+        "    });"
+        "  });"
+        "})();"
+    )
@@ -4,86 +4,166 @@ Currently provides an Ollama-backed embedder via `create_embedder`.
 """
 from __future__ import annotations
 
+import asyncio
 import datetime
-from typing import Iterable, List
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Any, Callable, Iterable, List
+
+import numpy as np
 
 
 class OllamaEmbedder:
-    def __init__(self, model: str):
+    def __init__(self, model: str, max_concurrency: int = 4):
         try:
             from ollama import Client
         except Exception as exc:  # pragma: no cover - environment dependent
             raise RuntimeError("ollama package is required for OllamaEmbedder") from exc
 
+        # One Client (and its keep-alive HTTP connection) is reused for every batch.
         self.client = Client()
         self.model = model
+        # Batches `embed_texts` keeps in flight at once; Ollama typically serves
+        # 2-4 embed requests in parallel.
+        self.max_concurrency = max_concurrency
+        self._call_variant: int | None = None
 
-    def embed_texts(self, texts: Iterable[str], batch_size: int = 64) -> List[List[float]]:
+    def embed_texts(self, texts: Iterable[str], batch_size: int = 64) -> np.ndarray:
         """Compute embeddings for an iterable of texts.
 
-        Returns a list of lists of floats in the same order as `texts`.
+        Returns a float32 ``(N, D)`` matrix whose rows follow the order of
+        `texts`. Up to `max_concurrency` batches are sent at once on worker
+        threads, so one batch uploads while the server is still computing
+        another.
+        """
+        batches = _iter_batches(texts, batch_size)
+        if self.max_concurrency <= 1:
+            blocks = [self._embed_batch(batch) for batch in batches]
+        else:
+            with ThreadPoolExecutor(max_workers=self.max_concurrency) as executor:
+                blocks = list(executor.map(self._embed_batch, batches))
+        if not blocks:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.concatenate(blocks)
+
+    async def embed_texts_async(
+        self,
+        texts: Iterable[str],
+        batch_size: int = 64,
+        max_concurrency: int = 8,
+    ) -> List[List[float]]:
+        """Like `embed_texts`, but sends up to `max_concurrency` batches at once.
+
+        Results keep the order of `texts`.
         """
-        results: List[List[float]] = []
-        batch: List[str] = []
-        for text in texts:
-            batch.append(text)
-            if len(batch) >= batch_size:
-                results.extend(self._embed_batch(batch))
-                batch = []
+        items = list(texts)
+        results: List[Any] = [None] * len(items)
 
-        if batch:
-            results.extend(self._embed_batch(batch))
+        def _store(start: int, batch_embeddings: List[List[float]]) -> None:
+            results[start : start + len(batch_embeddings)] = batch_embeddings
 
+        await self._embed_batches_async(items, batch_size, max_concurrency, _store)
         return results
 
-    def _embed_batch(self, batch: List[str]) -> List[List[float]]:
-        # Try several possible client signatures to maximize compatibility
-        response = None
-        errors: List[str] = []
+    async def embed_matrix_async(
+        self,
+        texts: Iterable[str],
+        batch_size: int = 64,
+        max_concurrency: int = 8,
+    ) -> np.ndarray:
+        """Like `embed_texts_async`, but fills one float32 ``(N, D)`` matrix.
+
+        The matrix is allocated once the first batch reveals the dimension, and
+        each batch is copied into its rows as it arrives.
+        """
+        items = list(texts)
+        matrix: np.ndarray | None = None
+
+        def _store(start: int, batch_embeddings: List[List[float]]) -> None:
+            nonlocal matrix
+            block = np.asarray(batch_embeddings, dtype=np.float32)
+            if matrix is None:
+                matrix = np.empty((len(items), block.shape[1]), dtype=np.float32)
+            matrix[start : start + len(block)] = block
+
+        await self._embed_batches_async(items, batch_size, max_concurrency, _store)
+        if matrix is None:
+            return np.empty((0, 0), dtype=np.float32)
+        return matrix
+
+    async def _embed_batches_async(
+        self,
+        items: List[str],
+        batch_size: int,
+        max_concurrency: int,
+        store: Callable[[int, List[List[float]]], None],
+    ) -> None:
+        from ollama import AsyncClient
+
+        sem = asyncio.Semaphore(max(1, max_concurrency))
+        client = AsyncClient()
+
+        async def _embed(start: int) -> None:
+            batch = items[start : start + batch_size]
+            async with sem:
+                try:
+                    response = await client.embed(model=self.model, input=batch)
+                except Exception as exc:  # pragma: no cover - runtime dependent
+                    raise RuntimeError(f"Ollama embeddings call failed: {exc}") from exc
+            store(start, self._parse_embeddings(response))
 
-        # Variant 0: top-level `ollama.embed(...)`
-        def _try_module_embed():
+        try:
+            await asyncio.gather(*(_embed(start) for start in range(0, len(items), batch_size)))
+        finally:
+            close = getattr(client, "close", None)
+            if close is not None:
+                await close()
+
+    def _embed_batch(self, batch: List[str]) -> np.ndarray:
+        # Once a signature works, call it directly for later batches and only
+        # fall back to probing the others if it starts failing.
+        if self._call_variant is not None:
             try:
-                import ollama  # type: ignore
+                response = _EMBED_CALL_VARIANTS[self._call_variant](self, batch)
+            except Exception:  # pragma: no cover - runtime dependent
+                pass
+            else:
+                return self._embedding_matrix(response)
 
-                return ollama.embed(model=self.model, input=batch)
-            except Exception:
-                # Some versions may expose `embed` differently; re-raise to be
-                # handled by the caller.
-                raise
-
-        call_variants = [
-            _try_module_embed,
-            lambda: self.client.embeddings(model=self.model, input=batch),
-            lambda: self.client.embeddings(model=self.model, inputs=batch),
-            lambda: self.client.embeddings(model=self.model, texts=batch),
-            lambda: self.client.embeddings(model=self.model, text=batch),
-            lambda: self.client.embed(model=self.model, input=batch),
-            lambda: self.client.embed(model=self.model, inputs=batch),
-            lambda: self.client.embed(batch, model=self.model),
-            lambda: self.client.embeddings(batch, model=self.model),
-            lambda: self.client.embeddings(batch),
-            lambda: self.client.embed(batch),
-        ]
-
-        for fn in call_variants:
+        # Try several possible client signatures to maximize compatibility
+        errors: List[str] = []
+        for index, call in enumerate(_EMBED_CALL_VARIANTS):
             try:
-                response = fn()
-                break
+                response = call(self, batch)
             except Exception as exc:  # pragma: no cover - runtime dependent
                 errors.append(str(exc))
-
-        if response is None:
-            raise RuntimeError(f"Ollama embeddings call failed: {' | '.join(errors)}")
-
+                continue
+            self._call_variant = index
+            return self._embedding_matrix(response)
+
+        raise RuntimeError(f"Ollama embeddings call failed: {' | '.join(errors)}")
+
+    @classmethod
+    def _embedding_matrix(cls, response: Any) -> np.ndarray:
+        """Float32 ``(batch, D)`` rows of an embed response."""
+        # `/api/embed` responses already hold a list of float lists; convert them
+        # straight to an array instead of copying every row into a new list first.
+        if isinstance(response, dict):
+            rows = response.get("embeddings")
+        else:
+            rows = getattr(response, "embeddings", None)
+        if not isinstance(rows, list):
+            rows = cls._parse_embeddings(response)
+        return np.asarray(rows, dtype=np.float32)
+
+    @staticmethod
+    def _parse_embeddings(response: Any) -> List[List[float]]:
         # Support different client return shapes. Prefer response['embeddings']
         embeddings: List[List[float]] = []
 
         # Case: module-level or client returns {'embeddings': [...]}
         if isinstance(response, dict) and "embeddings" in response:
-            for emb in response["embeddings"]:
-                embeddings.append(list(emb))
-            return embeddings
+            return [list(emb) for emb in response["embeddings"]]
 
         # Case: response is an object with `.embeddings` attribute (EmbedResponse)
         if hasattr(response, "embeddings"):
@@ -132,9 +212,41 @@ class OllamaEmbedder:
             raise RuntimeError(f"Unexpected embeddings response format: {exc}") from exc
 
 
+def _iter_batches(texts: Iterable[str], batch_size: int) -> Iterable[List[str]]:
+    iterator = iter(texts)
+    while batch := list(islice(iterator, batch_size)):
+        yield batch
+
+
+def _module_embed(embedder: OllamaEmbedder, batch: List[str]) -> Any:
+    # Fallback: top-level `ollama.embed(...)` (module-global client)
+    import ollama  # type: ignore
+
+    return ollama.embed(model=embedder.model, input=batch)
+
+
+# Client signatures tried by `OllamaEmbedder._embed_batch`, in order. Built once
+# instead of as fresh closures for every batch.
+# `Client.embed` posts the whole batch to /api/embed in one request.
+_EMBED_CALL_VARIANTS: tuple[Callable[[OllamaEmbedder, List[str]], Any], ...] = (
+    lambda self, batch: self.client.embed(model=self.model, input=batch),
+    _module_embed,
+    lambda self, batch: self.client.embeddings(model=self.model, input=batch),
+    lambda self, batch: self.client.embeddings(model=self.model, inputs=batch),
+    lambda self, batch: self.client.embeddings(model=self.model, texts=batch),
+    lambda self, batch: self.client.embeddings(model=self.model, text=batch),
+    lambda self, batch: self.client.embed(model=self.model, inputs=batch),
+    lambda self, batch: self.client.embed(batch, model=self.model),
+    lambda self, batch: self.client.embeddings(batch, model=self.model),
+    lambda self, batch: self.client.embeddings(batch),
+    lambda self, batch: self.client.embed(batch),
+)
+
+
 def create_embedder(model: str = "embeddinggemma:300m") -> OllamaEmbedder:
     """Factory to create a default embedder.
 
-    Currently returns an OllamaEmbedder instance.
+    Currently returns an OllamaEmbedder instance; its `embed_texts` returns a
+    float32 numpy matrix, so call `.tolist()` before dumping it to JSON.
     """
     return OllamaEmbedder(model=model)
@@ -1,18 +1,19 @@
 import hashlib
-import re
-
-
-WHITESPACE_PATTERN = re.compile(r"\s+")
 
 
 def canonicalize_text(value: str) -> str:
     if value is None:
         return ""
-    normalized = WHITESPACE_PATTERN.sub(" ", str(value)).strip().casefold()
-    return normalized
+    # str.split() uses the same whitespace set as the old r"\s+" pattern, so
+    # this collapses runs and trims the ends without a regex pass.
+    return " ".join(str(value).split()).casefold()
+
 
+def generate_card_id(question: str, answer: str, topic: str, scheme: str = "blake2b") -> str:
+    """Return a 12 hex-char fingerprint of the card's canonical content.
 
-def generate_card_id(question: str, answer: str, topic: str) -> str:
+    ``scheme="sha256"`` reproduces the truncated SHA-256 IDs of older exports.
+    """
     canonical = "|".join(
         [
             canonicalize_text(question),
@@ -20,8 +21,28 @@ def generate_card_id(question: str, answer: str, topic: str) -> str:
             canonicalize_text(topic),
         ]
     )
-    digest = hashlib.sha256(canonical.encode("utf-8")).hexdigest()
-    return digest[:12]
+    if scheme == "sha256":
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+    if scheme != "blake2b":
+        raise ValueError(f"Unsupported card ID scheme: {scheme}")
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=6).hexdigest()
+
+
+def generate_card_ids_bulk(cards: list[dict[str, str]]) -> list[str]:
+    """Same IDs as ``generate_card_id`` for each card, in one tight loop."""
+    blake2b = hashlib.blake2b
+    canonicalize = canonicalize_text
+    return [
+        blake2b(
+            (
+                f"{canonicalize(card.get('question', ''))}"
+                f"|{canonicalize(card.get('answer', ''))}"
+                f"|{canonicalize(card.get('topic', ''))}"
+            ).encode("utf-8"),
+            digest_size=6,
+        ).hexdigest()
+        for card in cards
+    ]
 
 
 def get_or_assign_id(card: dict[str, str]) -> str:
@@ -1,5 +1,8 @@
 import csv
+import mmap
+import os
 from pathlib import Path
+from typing import Iterable, Iterator
 
 
 ANKI_DEFAULT_HEADERS = [
@@ -31,32 +34,60 @@ HEADER_HINTS = {
 }
 
 
-def read_tsv(path: str, delimiter: str = "\t") -> tuple[list[str], list[dict[str, str]]]:
-    rows = _read_raw_rows(Path(path), delimiter)
-    if not rows:
-        return [], []
+def read_tsv(
+    path: str,
+    delimiter: str = "\t",
+    use_mmap: bool = True,
+) -> tuple[list[str], list[dict[str, str]]]:
+    headers, rows = _open_tsv(Path(path), delimiter, use_mmap)
+    return headers, list(rows)
 
-    has_header = _looks_like_header(rows[0])
+
+def iter_tsv(path: str, delimiter: str = "\t", use_mmap: bool = True) -> Iterator[dict[str, str]]:
+    """Yield the same row dicts as ``read_tsv`` without holding them all in memory."""
+    _, rows = _open_tsv(Path(path), delimiter, use_mmap)
+    yield from rows
+
+
+def _open_tsv(
+    path: Path,
+    delimiter: str,
+    use_mmap: bool,
+) -> tuple[list[str], Iterator[dict[str, str]]]:
+    first_row = next(_iter_raw_rows(path, delimiter, use_mmap), None)
+    if first_row is None:
+        return [], iter(())
+
+    has_header = _looks_like_header(first_row)
     if has_header:
-        headers = [_normalize_header_name(value, index) for index, value in enumerate(rows[0])]
-        data_rows = rows[1:]
+        headers = [_normalize_header_name(value, index) for index, value in enumerate(first_row)]
     else:
-        width = max(len(row) for row in rows)
+        # Headerless exports are sized by their widest row, so measure it in a
+        # separate pass instead of keeping every row around.
+        width = max(len(row) for row in _iter_raw_rows(path, delimiter, use_mmap))
         headers = _build_headers(width)
-        data_rows = rows
-
-    normalized_rows = []
-    for row in data_rows:
+    return headers, _iter_row_dicts(path, delimiter, use_mmap, headers, skip_first=has_header)
+
+
+def _iter_row_dicts(
+    path: Path,
+    delimiter: str,
+    use_mmap: bool,
+    headers: list[str],
+    skip_first: bool,
+) -> Iterator[dict[str, str]]:
+    rows = _iter_raw_rows(path, delimiter, use_mmap)
+    if skip_first:
+        next(rows, None)
+    for row in rows:
         if not any(cell.strip() for cell in row):
             continue
-        row_dict = _row_to_dict(headers, row)
-        normalized_rows.append(row_dict)
-
-    return headers, normalized_rows
+        yield _row_to_dict(headers, row)
 
 
 def normalize_card(row: dict[str, str]) -> dict[str, str]:
-    card = {key: (value.strip() if isinstance(value, str) else value) for key, value in row.items()}
+    # Values from read_tsv/iter_tsv are already stripped by _row_to_dict.
+    card = dict(row)
 
     options_value = card.get("options", "")
     choices_value = card.get("choices", "")
@@ -81,17 +112,41 @@ def validate_card(card: dict[str, str]) -> None:
         raise ValueError("Card is missing required field: answer")
 
 
-def _read_raw_rows(path: Path, delimiter: str) -> list[list[str]]:
-    with path.open("r", encoding="utf-8", newline="") as handle:
-        reader = csv.reader(handle, delimiter=delimiter)
-        rows = []
-        for row in reader:
-            if not row:
-                continue
-            if row[0].startswith("#"):
-                continue
-            rows.append(row)
-    return rows
+def _iter_raw_rows(path: Path, delimiter: str, use_mmap: bool = True) -> Iterator[list[str]]:
+    if not use_mmap:
+        with path.open("r", encoding="utf-8", newline="") as handle:
+            yield from _filter_rows(handle, delimiter)
+        return
+    yield from _filter_rows(_iter_mapped_lines(path), delimiter)
+
+
+def _filter_rows(lines: Iterable[str], delimiter: str) -> Iterator[list[str]]:
+    for row in csv.reader(lines, delimiter=delimiter):
+        if not row:
+            continue
+        if row[0].startswith("#"):
+            continue
+        yield row
+
+
+def _iter_mapped_lines(path: Path) -> Iterator[str]:
+    """Yield lines (newline included) from a memory-mapped file.
+
+    Lines are decoded one at a time so the whole file is never held as a
+    single Python string; csv still sees the line endings it needs for
+    quoted multi-line fields.
+    """
+    with path.open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size == 0:
+            return
+        with mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            start = 0
+            size = len(mapped)
+            while start < size:
+                end = mapped.find(b"\n", start)
+                end = size if end == -1 else end + 1
+                yield mapped[start:end].decode("utf-8")
+                start = end
 
 
 def _looks_like_header(row: list[str]) -> bool:
@@ -123,4 +178,4 @@ def _row_to_dict(headers: list[str], row: list[str]) -> dict[str, str]:
     elif len(padded) > len(headers):
         padded = padded[: len(headers)]
 
-    return {header: value for header, value in zip(headers, padded)}
+    return {header: value.strip() for header, value in zip(headers, padded)}
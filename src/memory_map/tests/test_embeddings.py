@@ -0,0 +1,126 @@
+import numpy as np
+
+from src.memory_map.embeddings import OllamaEmbedder
+
+
+class FakeClient:
+    def __init__(self):
+        self.calls = []
+
+    def embed(self, model, input):
+        self.calls.append(list(input))
+        return {"embeddings": [[float(len(text))] for text in input]}
+
+
+def test_embed_texts_sends_one_request_per_batch():
+    embedder = OllamaEmbedder(model="m", max_concurrency=1)
+    embedder.client = FakeClient()
+
+    texts = [f"text{index}" for index in range(130)]
+    embeddings = embedder.embed_texts(texts, batch_size=64)
+
+    assert [len(batch) for batch in embedder.client.calls] == [64, 64, 2]
+    assert embeddings.dtype == np.float32
+    assert embeddings.tolist() == [[float(len(text))] for text in texts]
+
+
+def test_embed_texts_keeps_order_across_worker_threads():
+    import threading
+    import time
+
+    class SlowFirstClient:
+        def __init__(self):
+            self.active = 0
+            self.peak = 0
+            self.lock = threading.Lock()
+
+        def embed(self, model, input):
+            with self.lock:
+                self.active += 1
+                self.peak = max(self.peak, self.active)
+            time.sleep(0.02 if input[0] == "text0" else 0.01)
+            with self.lock:
+                self.active -= 1
+            return {"embeddings": [[float(text[4:])] for text in input]}
+
+    embedder = OllamaEmbedder(model="m", max_concurrency=3)
+    embedder.client = SlowFirstClient()
+    embedder._call_variant = 0
+
+    embeddings = embedder.embed_texts((f"text{index}" for index in range(10)), batch_size=2)
+
+    assert embeddings.tolist() == [[float(index)] for index in range(10)]
+    assert 1 < embedder.client.peak <= 3
+
+
+def test_embed_batch_reuses_the_first_working_signature():
+    class LegacyClient:
+        def __init__(self):
+            self.attempts = 0
+
+        def embed(self, *args, **kwargs):
+            self.attempts += 1
+            raise TypeError("unsupported")
+
+        def embeddings(self, model, input):
+            self.attempts += 1
+            return {"data": [{"embedding": [float(len(text))]} for text in input]}
+
+    embedder = OllamaEmbedder(model="m")
+    embedder.client = LegacyClient()
+    embedder._call_variant = 2
+
+    assert embedder.embed_texts(["a", "bb", "ccc"], batch_size=2).tolist() == [[1.0], [2.0], [3.0]]
+    assert embedder.client.attempts == 2
+
+
+def test_embed_texts_async_keeps_order_across_concurrent_batches(monkeypatch):
+    import asyncio
+
+    import ollama
+
+    class FakeAsyncClient:
+        calls: list[list[str]] = []
+
+        async def embed(self, model, input):
+            # The first batch finishes last.
+            await asyncio.sleep(0.01 if input[0] == "text0" else 0)
+            self.calls.append(list(input))
+            return {"embeddings": [[float(text[4:])] for text in input]}
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(ollama, "AsyncClient", FakeAsyncClient)
+    embedder = OllamaEmbedder(model="m")
+
+    texts = [f"text{index}" for index in range(10)]
+    embeddings = asyncio.run(embedder.embed_texts_async(texts, batch_size=3, max_concurrency=4))
+
+    assert len(FakeAsyncClient.calls) == 4
+    assert embeddings == [[float(index)] for index in range(10)]
+
+
+def test_embed_matrix_async_fills_preallocated_float32_rows(monkeypatch):
+    import asyncio
+
+    import numpy as np
+    import ollama
+
+    class FakeAsyncClient:
+        async def embed(self, model, input):
+            await asyncio.sleep(0.01 if input[0] == "text0" else 0)
+            return {"embeddings": [[float(text[4:]), 1.0] for text in input]}
+
+        async def close(self):
+            pass
+
+    monkeypatch.setattr(ollama, "AsyncClient", FakeAsyncClient)
+    embedder = OllamaEmbedder(model="m")
+
+    texts = [f"text{index}" for index in range(7)]
+    matrix = asyncio.run(embedder.embed_matrix_async(texts, batch_size=3, max_concurrency=4))
+
+    assert matrix.dtype == np.float32
+    assert matrix.shape == (7, 2)
+    assert matrix[:, 0].tolist() == [float(index) for index in range(7)]
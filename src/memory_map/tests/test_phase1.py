@@ -1,3 +1,4 @@
+import hashlib
 from pathlib import Path
 
 import pytest
@@ -38,6 +39,27 @@ def test_duplicate_card_content_gets_same_id():
     assert ids.get_or_assign_id(card_a) == ids.get_or_assign_id(card_b)
 
 
+def test_generate_card_ids_bulk_matches_single_card_ids():
+    cards = [
+        {"question": "What is AWS?", "answer": "A cloud platform", "topic": "Cloud"},
+        {"question": "  what  is aws? ", "answer": "A cloud platform"},
+        {"question": "Q", "answer": "A", "topic": None},
+    ]
+
+    assert ids.generate_card_ids_bulk(cards) == [
+        ids.generate_card_id(card.get("question", ""), card.get("answer", ""), card.get("topic", ""))
+        for card in cards
+    ]
+
+
+def test_generate_card_id_keeps_legacy_sha256_scheme():
+    card_id = ids.generate_card_id("Q", "A", "T")
+    legacy_id = ids.generate_card_id("Q", "A", "T", scheme="sha256")
+
+    assert len(card_id) == len(legacy_id) == 12
+    assert legacy_id == hashlib.sha256(b"q|a|t").hexdigest()[:12]
+
+
 def test_normalize_card_coalesces_choices_into_options():
     normalized = parser.normalize_card(
         {
@@ -86,3 +108,21 @@ def test_ids_are_deterministic_across_reruns():
         second_ids.append(ids.get_or_assign_id(card))
 
     assert first_ids == second_ids
+
+
+def test_read_tsv_mmap_and_buffered_paths_agree():
+    assert parser.read_tsv(str(TEST_CARDS_PATH), use_mmap=True) == parser.read_tsv(
+        str(TEST_CARDS_PATH), use_mmap=False
+    )
+
+
+def test_iter_tsv_streams_the_same_rows_for_headerless_files(tmp_path):
+    path = tmp_path / "cards.txt"
+    path.write_text("Basic\tdeck\ts1\tQ\tA\n# comment\n\t\t\nBasic\tdeck\ts2\tQ2\tA2\tX\n", encoding="utf-8")
+
+    headers, rows = parser.read_tsv(str(path))
+
+    assert headers == parser.ANKI_DEFAULT_HEADERS[:6]
+    assert [row["source_id"] for row in rows] == ["s1", "s2"]
+    assert rows[0]["options"] == ""
+    assert list(parser.iter_tsv(str(path))) == rows
@@ -72,3 +72,36 @@ def test_compute_layout_pca_is_deterministic_for_seed():
     coords_2 = compute_layout(embeddings, method="pca", seed=42)
 
     assert np.array_equal(coords_1, coords_2)
+
+
+def test_visualize_memory_map_reads_npz_embeddings(tmp_path: Path):
+    ids = [f"card_{index+1}" for index in range(4)]
+    embeddings_path = tmp_path / "embeddings.npz"
+    np.savez(
+        embeddings_path,
+        embeddings=np.arange(16, dtype=np.float16).reshape(4, 4),
+        ids=np.asarray(ids, dtype=str),
+    )
+
+    tsv_path = tmp_path / "cards.tsv"
+    lines = ["source_id\tquestion\tanswer\ttopic"]
+    lines.extend(f"{card_id}\tQuestion {card_id}\tAnswer {card_id}\tTopic" for card_id in ids)
+    tsv_path.write_text("\n".join(lines), encoding="utf-8")
+
+    out_neighbors = tmp_path / "neighbors.json"
+    rc = vm.main(
+        [
+            "--in-embeddings",
+            str(embeddings_path),
+            "--input-tsv",
+            str(tsv_path),
+            "--k",
+            "2",
+            "--out-neighbors",
+            str(out_neighbors),
+        ]
+    )
+
+    assert rc == 0
+    payload = json.loads(out_neighbors.read_text(encoding="utf-8"))
+    assert [card["id"] for card in payload["cards"]] == ids
@@ -1,6 +1,7 @@
-import json
 import os
 
+import orjson
+
 from .constants import STATE_FILE
 
 
@@ -9,17 +10,18 @@ class ReaderState:
         self.book_path = ""
         self.chapter_index = 0
         self.offset_ms = 0
+        self._last_saved = None
 
     def load(self):
         if not os.path.exists(STATE_FILE):
             return
         try:
-            with open(STATE_FILE, "r", encoding="utf-8") as handle:
-                data = json.load(handle)
+            with open(STATE_FILE, "rb") as handle:
+                data = orjson.loads(handle.read())
             self.book_path = data.get("book_path", "")
             self.chapter_index = int(data.get("chapter_index", 0))
             self.offset_ms = int(data.get("offset_ms", 0))
-        except (OSError, ValueError, json.JSONDecodeError):
+        except (OSError, ValueError, orjson.JSONDecodeError):
             pass
 
     def save(self):
@@ -28,5 +30,13 @@ class ReaderState:
             "chapter_index": self.chapter_index,
             "offset_ms": self.offset_ms,
         }
-        with open(STATE_FILE, "w", encoding="utf-8") as handle:
-            json.dump(data, handle, indent=2)
+        blob = orjson.dumps(data)
+        # Repeated pause/stop saves usually produce the same bytes.
+        if blob == self._last_saved:
+            return
+        # Swap in a finished temp file so a crash mid-write can't corrupt the state.
+        temp_file = f"{STATE_FILE}.tmp"
+        with open(temp_file, "wb") as handle:
+            handle.write(blob)
+        os.replace(temp_file, STATE_FILE)
+        self._last_saved = blob
@@ -1,15 +1,77 @@
+import hashlib
+import mmap
+import os
 import queue
 import threading
 import time
 
 import numpy as np
 
-from ..constants import BLOCK_SIZE, SAMPLE_RATE, SPEED, VOICE, VOLUME
+from ..constants import (
+    BLOCK_SIZE,
+    SAMPLE_RATE,
+    SPEED,
+    TTS_AUDIO_CACHE,
+    TTS_AUDIO_CACHE_DIR,
+    TTS_AUDIO_CACHE_MAX_BYTES,
+    VOICE,
+    VOLUME,
+)
+
+# Samples buffered between the playback worker and the audio callback.
+RING_FRAMES = 4 * BLOCK_SIZE
+
+
+class _SampleRing:
+    """Single-producer, single-consumer float32 ring buffer.
+
+    The playback worker writes and the audio callback reads. Each side only
+    advances its own counter, so no lock is needed under the GIL.
+    """
+
+    def __init__(self, capacity):
+        self._buffer = np.zeros(capacity, dtype=np.float32)
+        self._capacity = capacity
+        self._head = 0
+        self._tail = 0
+        self._space = threading.Event()
+
+    @property
+    def pending(self):
+        return self._head - self._tail
+
+    def write(self, samples):
+        """Copy as many of `samples` as fit; return how many were written."""
+        count = min(len(samples), self._capacity - self.pending)
+        start = self._head % self._capacity
+        first = min(count, self._capacity - start)
+        self._buffer[start : start + first] = samples[:first]
+        self._buffer[: count - first] = samples[first:count]
+        self._head += count
+        return count
+
+    def read_into(self, out):
+        """Fill the front of `out` with buffered samples; return how many."""
+        count = min(len(out), self.pending)
+        start = self._tail % self._capacity
+        first = min(count, self._capacity - start)
+        out[:first] = self._buffer[start : start + first]
+        out[first:count] = self._buffer[: count - first]
+        self._tail += count
+        self._space.set()
+        return count
+
+    def wait_for_space(self, timeout):
+        self._space.wait(timeout)
+        self._space.clear()
 
 
 class TtsPlayer:
-    def __init__(self, pipeline):
+    def __init__(self, pipeline, audio_cache=False):
         self.pipeline = pipeline
+        # Persist synthesized audio under TTS_AUDIO_CACHE_DIR. Only worth it for
+        # text that is played again (book chapters), so callers opt in.
+        self.audio_cache = audio_cache
         self.text = ""
         self.play_thread = None
         self.play_lock = threading.Lock()
@@ -24,6 +86,9 @@ class TtsPlayer:
         self.resume_event = threading.Event()
         self.resume_event.set()
         self.on_state = None
+        # Called from the playback thread once a play() run has ended, whether it
+        # finished, was stopped, or failed.
+        self.on_finished = None
 
     def _notify_state(self):
         if self.on_state:
@@ -35,9 +100,108 @@ class TtsPlayer:
         self.offset_ms = 0
         self.offset_samples = 0
 
+    def has_cached_audio(self, text):
+        """True if `text` can be played from the audio cache without the pipeline."""
+        cache_path = self._audio_cache_path(text)
+        return bool(cache_path) and os.path.exists(cache_path)
+
     def _chunk_segments(self, text):
-        for _, _, audio in self.pipeline(text, voice=VOICE, speed=SPEED, split_pattern=r"\n+"):
-            yield self._to_float32(audio)
+        cache_path = self._audio_cache_path(text)
+        if cache_path and os.path.exists(cache_path):
+            try:
+                # Mark the entry as recently played for _evict_audio_cache.
+                os.utime(cache_path)
+            except OSError:
+                pass
+            yield self._map_cached_audio(cache_path)
+            return
+        segments = (
+            self._to_float32(audio)
+            for _, _, audio in self.pipeline(text, voice=VOICE, speed=SPEED, split_pattern=r"\n+")
+        )
+        if cache_path is None:
+            yield from segments
+        else:
+            yield from self._cache_segments(segments, cache_path)
+
+    @staticmethod
+    def _map_cached_audio(cache_path):
+        """Read-only float32 view of a cached PCM file, backed by the page cache.
+
+        Only the pages around the playback position are resident, so even
+        hour-long chapters start at once without loading the whole file.
+        """
+        with open(cache_path, "rb") as handle:
+            mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mapped, "madvise"):
+            # Playback reads front to back: read ahead and drop pages behind.
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        return np.frombuffer(mapped, dtype=np.float32)
+
+    def _audio_cache_path(self, text):
+        """Raw float32 PCM file for `text` at the current voice settings, or None."""
+        if not (self.audio_cache and TTS_AUDIO_CACHE) or not text:
+            return None
+        settings = f"{VOICE}|{SPEED}|{VOLUME}|{SAMPLE_RATE}\0"
+        key = hashlib.blake2b((settings + text).encode("utf-8"), digest_size=16).hexdigest()
+        return os.path.join(TTS_AUDIO_CACHE_DIR, f"{key}.f32")
+
+    @staticmethod
+    def _cache_segments(segments, cache_path):
+        """Pass `segments` through while appending them to `cache_path`.
+
+        The file only appears once every segment was synthesized; playback
+        stopped part way leaves no cache entry behind.
+        """
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f"{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        completed = False
+        try:
+            with open(tmp_path, "wb") as handle:
+                for segment in segments:
+                    segment.tofile(handle)
+                    yield segment
+            completed = True
+        finally:
+            if completed and os.path.getsize(tmp_path):
+                os.replace(tmp_path, cache_path)
+                TtsPlayer._evict_audio_cache(keep_path=cache_path)
+            else:
+                try:
+                    os.remove(tmp_path)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _evict_audio_cache(keep_path=None):
+        """Delete the least recently played entries until the cache fits TTS_AUDIO_CACHE_MAX_BYTES."""
+        entries = []
+        total = 0
+        try:
+            with os.scandir(TTS_AUDIO_CACHE_DIR) as scan:
+                for entry in scan:
+                    if not entry.name.endswith(".f32"):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    total += stat.st_size
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        entries.sort()
+        for _mtime, size, path in entries:
+            if total <= TTS_AUDIO_CACHE_MAX_BYTES:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                # Still mapped by a playing chapter (Windows); try again next time.
+                continue
+            total -= size
 
     def _produce_segments(self, text, out_queue):
         try:
@@ -60,10 +224,11 @@ class TtsPlayer:
     def _to_float32(audio):
         if audio is None:
             return np.zeros(1, dtype=np.float32)
-        audio = np.asarray(audio, dtype=np.float32)
-        # Apply volume/gain and clip to valid float32 audio range
-        audio = audio * VOLUME
-        return np.clip(audio, -1.0, 1.0)
+        # Apply volume/gain and clip to valid float32 audio range. The gain
+        # product is the only new array; clipping happens in place on it, so the
+        # pipeline's own buffer is never modified.
+        audio = np.multiply(np.asarray(audio, dtype=np.float32), VOLUME, dtype=np.float32)
+        return np.clip(audio, -1.0, 1.0, out=audio)
 
     @staticmethod
     def _ms_to_samples(ms):
@@ -95,7 +260,8 @@ class TtsPlayer:
             daemon=True,
         )
         producer.start()
-        stream = self._create_output_stream()
+        ring = _SampleRing(RING_FRAMES)
+        stream = self._create_output_stream(self._make_audio_callback(ring))
         stream.start()
         try:
             while True:
@@ -114,8 +280,11 @@ class TtsPlayer:
                     segment = segment[skip_samples:]
                     skip_samples = 0
 
-                if self._play_segment(segment, stream):
+                if self._play_segment(segment, stream, ring):
                     break
+            # Let the callback play out whatever is still buffered.
+            while ring.pending and not self.stop_event.is_set():
+                ring.wait_for_space(timeout=0.1)
         finally:
             stream.stop()
             stream.close()
@@ -125,9 +294,25 @@ class TtsPlayer:
                     self.offset_samples = 0
                 self.is_playing = False
             self._notify_state()
+            if self.on_finished:
+                self.on_finished()
+
+    def _make_audio_callback(self, ring):
+        def callback(outdata, frames, _time, _status):
+            out = outdata[:, 0]
+            played = 0
+            # Paused or stopped: emit silence and keep the buffered samples.
+            if self.resume_event.is_set() and not self.stop_event.is_set():
+                played = ring.read_into(out)
+            out[played:] = 0.0
+            if played:
+                self.offset_samples += played
+                self.offset_ms = self._samples_to_ms(self.offset_samples)
+
+        return callback
 
     @staticmethod
-    def _create_output_stream():
+    def _create_output_stream(callback):
         try:
             import sounddevice as sd
         except (ImportError, OSError) as err:
@@ -140,9 +325,15 @@ class TtsPlayer:
             channels=1,
             dtype="float32",
             blocksize=BLOCK_SIZE,
+            callback=callback,
         )
 
-    def _play_segment(self, segment, stream):
+    def _play_segment(self, segment, stream, ring):
+        """Feed `segment` into `ring`; return True if playback was stopped.
+
+        `offset_samples` is advanced by the audio callback as samples are
+        actually played, not here.
+        """
         position = 0
         total = len(segment)
         self.current_segment_start_samples = self.offset_samples
@@ -155,18 +346,16 @@ class TtsPlayer:
             if not self.resume_event.is_set():
                 if stream.active:
                     stream.stop()
-                while not self.resume_event.wait(timeout=0.1):
-                    if self.stop_event.is_set():
-                        return True
+                # stop() sets resume_event too, so this wakes up on either.
+                self.resume_event.wait()
+                if self.stop_event.is_set():
+                    return True
                 stream.start()
 
-            end = min(position + BLOCK_SIZE, total)
-            block = segment[position:end]
-            stream.write(block.reshape(-1, 1))
-            written = end - position
-            position = end
-            self.offset_samples += written
-            self.offset_ms = self._samples_to_ms(self.offset_samples)
+            written = ring.write(segment[position:])
+            position += written
+            if not written:
+                ring.wait_for_space(timeout=0.1)
         return False
 
     def pause(self):
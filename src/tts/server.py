@@ -1,157 +1,306 @@
-import json
+import asyncio
+import socket
 import threading
-import time
 from collections import deque
-from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from concurrent.futures import ThreadPoolExecutor
+
+import orjson
 
 
 class TtsQueueController:
-	def __init__(self, player, poll_interval=0.1):
+	def __init__(self, player):
 		self.player = player
 		self._queue = deque()
-		self._lock = threading.Lock()
+		# Guards the queue and player hand-off; the worker sleeps on it until
+		# something changes instead of polling.
+		self._cond = threading.Condition()
 		self._stop_event = threading.Event()
-		self._poll_interval = poll_interval
+		self.player.on_finished = self._on_playback_finished
 		self._worker = threading.Thread(target=self._queue_worker, daemon=True)
 		self._worker.start()
 
+	def _ready_for_next(self):
+		return self._stop_event.is_set() or (
+			self._queue
+			and not self.player.is_playing
+			and not self.player.is_paused
+		)
+
 	def _queue_worker(self):
-		while not self._stop_event.is_set():
-			with self._lock:
-				if (
-					self._queue
-					and not self.player.is_playing
-					and not self.player.is_paused
-				):
-					text = self._queue.popleft()
-					self.player.load_text(text)
-					self.player.play()
-			time.sleep(self._poll_interval)
+		while True:
+			with self._cond:
+				self._cond.wait_for(self._ready_for_next)
+				if self._stop_event.is_set():
+					return
+				text = self._queue.popleft()
+				self.player.load_text(text)
+				self.player.play()
+
+	def _on_playback_finished(self):
+		with self._cond:
+			self._cond.notify_all()
 
 	def speak(self, text):
 		clean_text = (text or "").strip()
 		if not clean_text:
 			return False
 
-		with self._lock:
+		self.speak_clean(clean_text)
+		return True
+
+	def speak_clean(self, clean_text):
+		"""`speak` for text that is already stripped and non-empty."""
+		with self._cond:
 			self._queue.clear()
 			self.player.load_text(clean_text)
 			self.player.play()
-		return True
+			self._cond.notify_all()
 
 	def add_to_queue(self, text):
 		clean_text = (text or "").strip()
 		if not clean_text:
 			return False
 
-		with self._lock:
-			self._queue.append(clean_text)
+		self.add_to_queue_clean(clean_text)
 		return True
 
+	def add_to_queue_clean(self, clean_text):
+		"""`add_to_queue` for text that is already stripped and non-empty."""
+		with self._cond:
+			self._queue.append(clean_text)
+			self._cond.notify_all()
+
 	def stop(self):
-		with self._lock:
+		with self._cond:
 			self._queue.clear()
 			self.player.stop()
+			self._cond.notify_all()
 
 	def queue_size(self):
-		with self._lock:
-			return len(self._queue)
+		# A single len() of a deque is atomic; no need to contend with the worker.
+		return len(self._queue)
 
 	def shutdown(self):
-		self._stop_event.set()
+		with self._cond:
+			self._stop_event.set()
+			self._cond.notify_all()
 		self._worker.join(timeout=1.0)
 
 
-class _TtsRequestHandler(BaseHTTPRequestHandler):
-	controller = None
+_ROUTES = ("/speak", "/addToQueue", "/stop")
+_REASONS = {
+	200: "OK",
+	204: "No Content",
+	400: "Bad Request",
+	404: "Not Found",
+	413: "Content Too Large",
+	501: "Not Implemented",
+}
+_COMMON_HEADERS = (
+	"Content-Type: application/json\r\n"
+	"Access-Control-Allow-Origin: *\r\n"
+	"Access-Control-Allow-Methods: POST, OPTIONS\r\n"
+	"Access-Control-Allow-Headers: Content-Type\r\n"
+)
+_MAX_HEADER_LINES = 100
+# Largest request body read into memory; a long pasted article is a few hundred KiB.
+MAX_BODY_BYTES = 1024 * 1024
+# Longest request or header line; the StreamReader limit.
+MAX_LINE_BYTES = 64 * 1024
+# Seconds an idle keep-alive connection is held open.
+KEEP_ALIVE_TIMEOUT = 30
+# Fixed response bodies, serialized once.
+_ERR_NOT_FOUND = orjson.dumps({"error": "Not found"})
+_ERR_BAD_JSON = orjson.dumps({"error": "Invalid JSON body"})
+_ERR_BAD_TEXT = orjson.dumps({"error": "Field 'text' must be a non-empty string"})
+_ERR_TOO_LARGE = orjson.dumps({"error": "Request body too large"})
+_ERR_LINE_TOO_LONG = orjson.dumps({"error": "Request line or header too long"})
 
-	def do_OPTIONS(self):
-		self.send_response(204)
-		self._send_common_headers()
-		self.end_headers()
 
-	def do_POST(self):
-		if self.path not in ("/speak", "/addToQueue", "/stop"):
-			self._send_json(404, {"error": "Not found"})
-			return
+def _decode_json_body(content_length, raw):
+	if content_length is None:
+		return None
+	if content_length <= 0:
+		return {}
+	try:
+		# Parses the bytes directly; invalid UTF-8 raises JSONDecodeError too.
+		return orjson.loads(raw)
+	except orjson.JSONDecodeError:
+		return None
 
-		if self.path == "/stop":
-			self.controller.stop()
-			self._send_json(200, {"ok": True, "queue_size": self.controller.queue_size()})
-			return
 
-		payload = self._read_json_body()
-		if payload is None:
-			self._send_json(400, {"error": "Invalid JSON body"})
-			return
+def _ok_body(queue_size):
+	return b'{"ok":true,"queue_size":%d}' % queue_size
 
-		text = payload.get("text") if isinstance(payload, dict) else None
-		if not isinstance(text, str) or not text.strip():
-			self._send_json(400, {"error": "Field 'text' must be a non-empty string"})
-			return
 
-		if self.path == "/speak":
-			self.controller.speak(text)
-			self._send_json(200, {"ok": True, "queue_size": self.controller.queue_size()})
-			return
+def _handle_request(controller, method, path, content_length, raw):
+	"""Return ``(status, body)`` for one request; body None means no body."""
+	if method == "OPTIONS":
+		return 204, None
+	if method != "POST":
+		return 501, orjson.dumps({"error": f"Unsupported method ({method})"})
+	if path not in _ROUTES:
+		return 404, _ERR_NOT_FOUND
 
-		self.controller.add_to_queue(text)
-		self._send_json(200, {"ok": True, "queue_size": self.controller.queue_size()})
+	if path == "/stop":
+		controller.stop()
+		return 200, _ok_body(controller.queue_size())
 
-	def _read_json_body(self):
-		try:
-			content_length = int(self.headers.get("Content-Length", "0"))
-		except ValueError:
-			return None
+	payload = _decode_json_body(content_length, raw)
+	if payload is None:
+		return 400, _ERR_BAD_JSON
 
-		if content_length <= 0:
-			return {}
+	text = payload.get("text") if isinstance(payload, dict) else None
+	# Strip once here; the controller's *_clean methods don't scan the text again.
+	clean_text = text.strip() if isinstance(text, str) else ""
+	if not clean_text:
+		return 400, _ERR_BAD_TEXT
 
-		raw = self.rfile.read(content_length)
-		try:
-			return json.loads(raw.decode("utf-8"))
-		except (json.JSONDecodeError, UnicodeDecodeError):
-			return None
+	if path == "/speak":
+		controller.speak_clean(clean_text)
+	else:
+		controller.add_to_queue_clean(clean_text)
+	return 200, _ok_body(controller.queue_size())
 
-	def _send_common_headers(self):
-		self.send_header("Content-Type", "application/json")
-		self.send_header("Access-Control-Allow-Origin", "*")
-		self.send_header("Access-Control-Allow-Methods", "POST, OPTIONS")
-		self.send_header("Access-Control-Allow-Headers", "Content-Type")
 
-	def _send_json(self, status_code, payload):
-		body = json.dumps(payload).encode("utf-8")
-		self.send_response(status_code)
-		self._send_common_headers()
-		self.send_header("Content-Length", str(len(body)))
-		self.end_headers()
-		self.wfile.write(body)
-
-	def log_message(self, _format, *_args):
-		return
+def _format_response(status, body, keep_alive=False):
+	connection = "keep-alive" if keep_alive else "close"
+	head = f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n{_COMMON_HEADERS}Connection: {connection}\r\n"
+	if body is None:
+		return f"{head}\r\n".encode("latin-1")
+	return f"{head}Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body
 
 
 class LocalTtsHttpServer:
-	def __init__(self, controller, host="127.0.0.1", port=8765):
+	"""Local control API served from one asyncio event loop on a background thread.
+
+	Every connection is handled on that loop, so requests don't each get a
+	new OS thread the way they did with ThreadingHTTPServer. Controller calls
+	run on a fixed pool of `max_workers` reusable threads, so one that blocks
+	(e.g. on the player lock) can't stall the loop.
+	"""
+
+	def __init__(self, controller, host="127.0.0.1", port=8765, max_workers=8):
 		self.controller = controller
 		self.host = host
-		self.port = port
-		handler_class = type("TtsRequestHandler", (_TtsRequestHandler,), {})
-		handler_class.controller = controller
-		self._server = ThreadingHTTPServer((host, port), handler_class)
-		self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+		# Bind now so a busy port fails here, as it did with ThreadingHTTPServer.
+		# create_server sets SO_REUSEADDR on POSIX, like HTTPServer did.
+		self._sock = socket.create_server((host, port))
+		self.port = self._sock.getsockname()[1]
+		self._loop = None
+		self._stopping = None
+		self._ready = threading.Event()
+		self._connections = {}
+		self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tts-http")
+		self._thread = threading.Thread(target=self._run, daemon=True)
 
 	def start(self):
 		self._thread.start()
+		self._ready.wait(timeout=1.0)
 
 	def shutdown(self):
-		self._server.shutdown()
-		self._server.server_close()
-		self._thread.join(timeout=1.0)
+		if self._loop is not None:
+			self._loop.call_soon_threadsafe(self._stopping.set)
+			self._thread.join(timeout=1.0)
+		self._sock.close()
+		self._executor.shutdown(wait=False)
+
+	def _run(self):
+		asyncio.run(self._serve())
+
+	async def _serve(self):
+		self._stopping = asyncio.Event()
+		server = await asyncio.start_server(self._handle_connection, sock=self._sock, limit=MAX_LINE_BYTES)
+		self._loop = asyncio.get_running_loop()
+		self._ready.set()
+		async with server:
+			await self._stopping.wait()
+			# Close idle keep-alive connections and let their handlers see EOF,
+			# rather than leaving them to be cancelled mid-read.
+			for writer in self._connections.values():
+				writer.close()
+			await asyncio.gather(*self._connections, return_exceptions=True)
+
+	async def _handle_connection(self, reader, writer):
+		sock = writer.get_extra_info("socket")
+		if sock is not None:
+			# Replies are one small write; don't let Nagle hold them back.
+			sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+		task = asyncio.current_task()
+		self._connections[task] = writer
+		try:
+			# Keep-alive: the extension's stream of /addToQueue calls reuses one
+			# connection instead of reconnecting per request.
+			while await self._serve_request(reader, writer):
+				pass
+		except ValueError:
+			# readline() turns a line longer than MAX_LINE_BYTES into ValueError.
+			try:
+				writer.write(_format_response(400, _ERR_LINE_TOO_LONG))
+				await writer.drain()
+			except ConnectionError:
+				pass
+		except (asyncio.IncompleteReadError, asyncio.TimeoutError, ConnectionError, TimeoutError):
+			# asyncio.TimeoutError is only the builtin TimeoutError from 3.11 on.
+			pass
+		finally:
+			self._connections.pop(task, None)
+			writer.close()
+
+	async def _serve_request(self, reader, writer):
+		"""Answer one request; return True if the connection stays open."""
+		request_line = await asyncio.wait_for(reader.readline(), KEEP_ALIVE_TIMEOUT)
+		parts = request_line.decode("latin-1").split()
+		if len(parts) != 3:
+			return False
+
+		method, path, version = parts
+		headers = {}
+		for _ in range(_MAX_HEADER_LINES):
+			line = await reader.readline()
+			if line in (b"\r\n", b"\n", b""):
+				break
+			name, _, value = line.decode("latin-1").partition(":")
+			headers[name.strip().lower()] = value.strip()
+
+		connection = headers.get("connection", "").lower()
+		if version == "HTTP/1.1":
+			keep_alive = "close" not in connection
+		else:
+			keep_alive = "keep-alive" in connection
+
+		raw_length = headers.get("content-length")
+		try:
+			content_length = int(raw_length) if raw_length else 0
+		except ValueError:
+			# Without a usable length the next request can't be framed.
+			content_length = None
+			keep_alive = False
+		if content_length and content_length > MAX_BODY_BYTES:
+			# Reject before reading, so an oversized POST is never buffered.
+			writer.write(_format_response(413, _ERR_TOO_LARGE, keep_alive=False))
+			await writer.drain()
+			return False
+		raw = b""
+		if content_length and content_length > 0:
+			raw = await reader.readexactly(content_length)
+
+		status, body = await self._loop.run_in_executor(
+			self._executor,
+			_handle_request,
+			self.controller,
+			method,
+			path,
+			content_length,
+			raw,
+		)
+		writer.write(_format_response(status, body, keep_alive))
+		await writer.drain()
+		return keep_alive
 
 
-def start_local_tts_server(player, host="127.0.0.1", port=8765):
+def start_local_tts_server(player, host="127.0.0.1", port=8765, max_workers=8):
 	controller = TtsQueueController(player)
-	server = LocalTtsHttpServer(controller=controller, host=host, port=port)
+	server = LocalTtsHttpServer(controller=controller, host=host, port=port, max_workers=max_workers)
 	server.start()
-	return server, controller
\ No newline at end of file
+	return server, controller
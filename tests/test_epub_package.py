@@ -0,0 +1,27 @@
+import zipfile
+
+from epub_view.epub_package import read_package
+
+
+def test_read_package_resolves_manifest_and_skips_nav_in_spine(tmp_path):
+    from ebooklib import epub
+
+    book = epub.EpubBook()
+    book.set_identifier("id")
+    book.set_title("Book")
+    chapter = epub.EpubHtml(title="c1", file_name="text/c1.xhtml")
+    chapter.content = "<h1>One</h1>"
+    book.add_item(chapter)
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = ["nav", chapter]
+    path = tmp_path / "book.epub"
+    epub.write_epub(str(path), book)
+
+    with zipfile.ZipFile(path) as archive:
+        opf_dir, manifest, spine = read_package(archive)
+        assert manifest[spine[0]][0] in archive.namelist()
+
+    assert opf_dir == "EPUB"
+    assert spine == [chapter.id]
+    assert manifest[chapter.id] == ("EPUB/text/c1.xhtml", "application/xhtml+xml")
@@ -0,0 +1,111 @@
+import pytest
+
+pytest.importorskip("PySide6")
+
+from src.epub_reader import EpubReaderApp
+
+
+def test_chapter_text_excludes_head_and_title():
+    tree = EpubReaderApp._parse_html(
+        b'<?xml version="1.0" encoding="utf-8"?>'
+        b'<html xmlns="http://www.w3.org/1999/xhtml"><head><title>Book Title Here</title>'
+        b"<style>p {}</style></head>"
+        b"<body><h1>Chapter 1</h1><p>Hello.</p><script>x()</script></body></html>"
+    )
+
+    assert EpubReaderApp._chapter_text(tree) == "Chapter 1\nHello."
+
+
+def test_prune_chapter_cache_keeps_most_recent_books(tmp_path, monkeypatch):
+    import os
+
+    import src.epub_reader as module
+
+    monkeypatch.setattr(module, "MAX_CACHED_BOOKS", 2)
+    for age, key in enumerate(["current", "newer", "older"]):
+        (tmp_path / key).mkdir()
+        (tmp_path / f"{key}.json").write_bytes(b"[]")
+        for path in (tmp_path / key, tmp_path / f"{key}.json"):
+            os.utime(path, (1000 - age, 1000 - age))
+    # The current book is kept even when it looks oldest.
+    for path in (tmp_path / "current", tmp_path / "current.json"):
+        os.utime(path, (1, 1))
+
+    EpubReaderApp._prune_chapter_cache(str(tmp_path), "current")
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["current", "current.json", "newer", "newer.json"]
+
+
+class _FakeTimer:
+    def __init__(self):
+        self.interval = None
+
+    def isActive(self):
+        return self.interval is not None
+
+    def start(self, interval):
+        self.interval = interval
+
+    def stop(self):
+        self.interval = None
+
+
+def test_highlight_timer_starts_once_slow_pipeline_begins_playback():
+    import threading
+    from types import SimpleNamespace
+
+    pipeline_loading = threading.Event()
+    playing = threading.Event()
+    app = SimpleNamespace(highlight_timer=_FakeTimer(), state=SimpleNamespace(offset_ms=0))
+
+    def _play():
+        app.player.is_playing = True
+        # Stands in for the queued controls_changed signal.
+        EpubReaderApp._sync_highlight_timer(app)
+        playing.set()
+
+    app.player = SimpleNamespace(
+        is_playing=False,
+        is_paused=False,
+        has_cached_audio=lambda _text: False,
+        load_text=lambda _text: None,
+        play=_play,
+    )
+    app._ensure_pipeline = lambda: pipeline_loading.wait(1.0)
+    app.status_changed = SimpleNamespace(emit=lambda _message: None)
+
+    EpubReaderApp._start_playback(app, "Hello.", "Chapter")
+    # A highlight tick while Kokoro is still loading must not leave the timer dead.
+    EpubReaderApp._update_highlight(app)
+    assert not app.highlight_timer.isActive()
+
+    pipeline_loading.set()
+    assert playing.wait(1.0)
+    assert app.highlight_timer.interval == 100
+
+
+def test_update_highlight_rearms_timer_when_chapter_is_not_ready():
+    from types import SimpleNamespace
+
+    app = SimpleNamespace(
+        player=SimpleNamespace(is_playing=True),
+        highlight_timer=_FakeTimer(),
+        chapter_list=SimpleNamespace(currentRow=lambda: 0),
+        chapters=[{"title": "Not parsed yet"}],
+    )
+
+    EpubReaderApp._update_highlight(app)
+    assert app.highlight_timer.isActive()
+
+    app.chapter_list.currentRow = lambda: -1
+    app.highlight_timer.stop()
+    EpubReaderApp._update_highlight(app)
+    assert app.highlight_timer.isActive()
+
+
+def test_has_body_text_skips_image_only_and_blank_documents():
+    head = b"<html><head><title>Cover</title><style>img {}</style></head>"
+
+    assert not EpubReaderApp._has_body_text(head + b'<body><div><img src="cover.jpg" alt="Cover"/></div></body></html>')
+    assert not EpubReaderApp._has_body_text(head + b"<body>\n&#160;<!-- blank --><script>x()</script></body></html>")
+    assert EpubReaderApp._has_body_text(head + b"<body><p>Hello.</p></body></html>")
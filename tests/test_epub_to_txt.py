@@ -0,0 +1,57 @@
+import epub_to_txt as module
+
+
+def test_clean_chapter_text_collapses_whitespace_and_drops_blank_lines():
+    soup = module.parse_chapter_html(
+        b"<html><head><title> Intro </title><style>p {}</style></head>"
+        b"<body><p>First   line\t here</p>\n\n\n<p>Second</p><script>x()</script></body></html>"
+    )
+
+    assert module.chapter_title(soup, "fallback") == "Intro"
+    assert module.clean_chapter_text(soup) == "Intro\nFirst line here\nSecond"
+
+
+def test_chapter_title_falls_back_to_header_then_name():
+    with_header = module.parse_chapter_html(b"<html><body><h2>Header</h2></body></html>")
+    without_header = module.parse_chapter_html(b"<html><body><p>x</p></body></html>")
+
+    assert module.chapter_title(with_header, "fallback") == "Header"
+    assert module.chapter_title(without_header, "fallback") == "fallback"
+
+
+def test_extract_epub_to_txt_numbers_chapters_in_spine_order(tmp_path):
+    from ebooklib import epub
+
+    book = epub.EpubBook()
+    book.set_identifier("id")
+    book.set_title("Book")
+    chapters = []
+    for index, body in enumerate(["<h1>One</h1><p>a</p>", "<script>x()</script>", "<h1>Two</h1><p>b</p>"], start=1):
+        chapter = epub.EpubHtml(title=f"c{index}", file_name=f"c{index}.xhtml")
+        chapter.content = f"<html><body>{body}</body></html>"
+        book.add_item(chapter)
+        chapters.append(chapter)
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    book.spine = chapters
+    epub_path = tmp_path / "book.epub"
+    epub.write_epub(str(epub_path), book)
+
+    out_dir = tmp_path / "out"
+    written = module.extract_epub_to_txt(epub_path, out_dir, workers=2)
+
+    assert written == 2
+    assert sorted(path.name for path in out_dir.glob("*.txt")) == ["001_One.txt", "002_Two.txt"]
+
+
+def test_clean_chapter_returns_title_and_text_from_one_parse():
+    html = b"<html><body><h1>Heading</h1><p>Body text</p><noscript>no</noscript></body></html>"
+
+    assert module.clean_chapter(html, "fallback") == ("Heading", "Heading\nBody text")
+
+
+def test_safe_filename_replaces_unsafe_characters_and_whitespace():
+    assert module.safe_filename('a\\b/c:d*e?f"g<h>i|j') == "a_b_c_d_e_f_g_h_i_j"
+    assert module.safe_filename("  Chapter  1:\tIntro. ") == "Chapter_1__Intro"
+    assert module.safe_filename("...") == "Untitled"
+    assert module.safe_filename("x" * 100, max_len=5) == "xxxxx"
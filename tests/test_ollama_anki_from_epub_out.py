@@ -1,9 +1,17 @@
+import asyncio
 import json
 from pathlib import Path
 
 import pytest
 
 import ollama_anki_from_epub_out as module
+from src.anki_gen.schemas import CardsPayload
+from src.anki_gen.validator import (
+    build_tsv_row_from_card,
+    build_tsv_row_from_validated_card,
+    iter_rows_from_cards,
+    sanitize_tag,
+)
 
 
 def _sample_card() -> dict:
@@ -17,6 +25,18 @@ def _sample_card() -> dict:
     }
 
 
+def _empty_context_chunk(main_block: str) -> dict:
+    return {
+        "main_block": main_block,
+        "main_start": 0,
+        "main_end": 0,
+        "before_start": 0,
+        "before_end": 0,
+        "after_start": 0,
+        "after_end": 0,
+    }
+
+
 def test_parse_cards_content_accepts_object_json():
     content = json.dumps({"cards": [_sample_card()]})
     cards = module.parse_cards_content(content)
@@ -39,6 +59,28 @@ def test_parse_cards_content_accepts_list_value():
     assert cards == [_sample_card()]
 
 
+def test_parse_cards_content_flattens_batched_chunks():
+    second = _sample_card()
+    second["question"] = "What is R?"
+    content = {"chunks": [{"cards": [_sample_card()]}, {"cards": [second]}]}
+    cards = module.parse_cards_content(json.dumps(content))
+    assert cards == [_sample_card(), second]
+
+
+def test_parse_cards_content_dict_fast_path_matches_pydantic():
+    card = dict(_sample_card(), question="  What is Q? ", options=[" A", "B ", "C", " "])
+    payload = {"cards": [card]}
+
+    cards = module.parse_cards_content(payload)
+
+    assert cards == CardsPayload.model_validate(payload).model_dump()["cards"]
+
+
+def test_parse_cards_content_dict_falls_back_to_pydantic_errors():
+    with pytest.raises(ValueError):
+        module.parse_cards_content({"cards": [dict(_sample_card(), options=["A", "B"])]})
+
+
 def test_parse_cards_content_accepts_case_mismatch_answer():
     card = _sample_card()
     card["answer"] = "aws"
@@ -48,6 +90,43 @@ def test_parse_cards_content_accepts_case_mismatch_answer():
     assert cards[0]["answer"] == "AWS"
 
 
+@pytest.mark.parametrize(
+    ("raw", "expected"),
+    [
+        ("aws", "aws"),
+        ("  AWS  S3\tbasics ", "AWS_S3_basics"),
+        ("deck::sub-topic", "deck::sub-topic"),
+        ("c++ & rust!", "c__rust"),
+        ("café\u00a0au lait", "caf_au_lait"),
+    ],
+)
+def test_sanitize_tag(raw: str, expected: str):
+    assert sanitize_tag(raw) == expected
+
+
+def test_validated_row_matches_checked_row_for_parsed_cards():
+    card = module.parse_cards_content({"cards": [dict(_sample_card(), tags=["aws s3", "x!"])]})[0]
+
+    assert build_tsv_row_from_validated_card(card, deck="D", card_id="f__0001") == (
+        build_tsv_row_from_card(dict(card, id="f__0001"), deck="D")
+    )
+
+
+def test_iter_rows_from_cards_is_lazy_and_skips_invalid_cards():
+    rows = iter_rows_from_cards([_sample_card(), {"question": "missing fields"}], deck="D")
+
+    assert not isinstance(rows, list)
+    assert list(rows) == [build_tsv_row_from_card(_sample_card(), deck="D")]
+
+
+def test_card_key_ignores_id_and_key_order():
+    card = _sample_card()
+    reordered = dict(reversed(list(card.items())), id="x__0001")
+
+    assert module._card_key(card) == module._card_key(reordered)
+    assert module._card_key(card) != module._card_key(dict(card, answer="B"))
+
+
 def test_parse_chunk_range_accepts_inclusive_1_based_values():
     assert module.parse_chunk_range("1-12") == (1, 12)
 
@@ -105,7 +184,7 @@ def test_generate_anki_file_processes_only_selected_chunk_range(monkeypatch, tmp
 
     seen_prompts: list[str] = []
 
-    def _fake_call_llm(prompt: str, **_kwargs):
+    async def _fake_call_llm_async(prompt: str, **_kwargs):
         seen_prompts.append(prompt)
         index = len(seen_prompts)
         return {
@@ -121,19 +200,292 @@ def test_generate_anki_file_processes_only_selected_chunk_range(monkeypatch, tmp
             ]
         }
 
-    monkeypatch.setattr(module, "call_llm", _fake_call_llm)
-
-    total = module.generate_anki_file(
-        input_dir=in_dir,
-        output_file=out_file,
-        model="m",
-        provider="openai",
-        deck="D",
-        chunk_size=100,
-        overlap=0,
-        limit_chunks=None,
-        chunk_range=(1, 2),
+    monkeypatch.setattr(module, "call_llm_async", _fake_call_llm_async)
+    monkeypatch.setattr(module, "create_async_client", lambda *_args, **_kwargs: None)
+
+    total = asyncio.run(
+        module.generate_anki_file(
+            input_dir=in_dir,
+            output_file=out_file,
+            model="m",
+            provider="openai",
+            deck="D",
+            chunk_size=100,
+            overlap=0,
+            limit_chunks=None,
+            chunk_range=(1, 2),
+        )
     )
 
     assert seen_prompts == ["chunk1", "chunk2"]
     assert total == 2
+
+
+def test_generate_anki_file_keeps_chunk_order_when_calls_finish_out_of_order(
+    monkeypatch, tmp_path: Path
+):
+    in_dir = tmp_path / "in"
+    out_file = tmp_path / "out.tsv"
+    in_dir.mkdir(parents=True, exist_ok=True)
+    (in_dir / "chapter.txt").write_text("unused", encoding="utf-8")
+
+    chunks = [
+        {
+            "main_block": f"chunk{index}",
+            "context_before": "",
+            "context_after": "",
+            "main_start": index,
+            "main_end": index + 1,
+            "before_start": index,
+            "before_end": index,
+            "after_start": index + 1,
+            "after_end": index + 1,
+        }
+        for index in range(1, 4)
+    ]
+
+    monkeypatch.setattr(module, "split_text_with_overlap", lambda *_args, **_kwargs: chunks)
+    monkeypatch.setattr(module, "make_prompt", lambda main_block, **_kwargs: main_block)
+    monkeypatch.setattr(module, "create_async_client", lambda *_args, **_kwargs: None)
+
+    async def _fake_call_llm_async(prompt: str, **_kwargs):
+        index = int(prompt.removeprefix("chunk"))
+        # Later chunks finish first.
+        await asyncio.sleep(0.01 * (4 - index))
+        card = _sample_card()
+        card["question"] = f"Q{index}"
+        return {"cards": [card]}
+
+    monkeypatch.setattr(module, "call_llm_async", _fake_call_llm_async)
+
+    total = asyncio.run(
+        module.generate_anki_file(
+            input_dir=in_dir,
+            output_file=out_file,
+            model="m",
+            provider="ollama",
+            deck="D",
+            chunk_size=100,
+            overlap=0,
+            limit_chunks=None,
+        )
+    )
+
+    assert total == 3
+    rows = out_file.read_text(encoding="utf-8").splitlines()[len(module.HEADER_LINES):]
+    assert [row.split("\t")[3] for row in rows] == ["Q1", "Q2", "Q3"]
+
+
+def test_generate_anki_file_batches_chunks_into_one_request(monkeypatch, tmp_path: Path):
+    in_dir = tmp_path / "in"
+    out_file = tmp_path / "out.tsv"
+    in_dir.mkdir(parents=True, exist_ok=True)
+    (in_dir / "chapter.txt").write_text("unused", encoding="utf-8")
+
+    chunks = [_empty_context_chunk(f"chunk{index}") for index in range(1, 4)]
+    monkeypatch.setattr(module, "split_text_with_overlap", lambda *_args, **_kwargs: chunks)
+    monkeypatch.setattr(module, "create_async_client", lambda *_args, **_kwargs: None)
+
+    calls: list[tuple[str, object]] = []
+
+    async def _fake_call_llm_async(prompt: str, response_model=None, **_kwargs):
+        calls.append((prompt, response_model))
+        blocks = [line for line in prompt.splitlines() if line.startswith("chunk")]
+        return {
+            "chunks": [
+                {"cards": [dict(_sample_card(), question=f"Q {block}")]} for block in blocks
+            ]
+        }
+
+    monkeypatch.setattr(module, "call_llm_async", _fake_call_llm_async)
+
+    total = asyncio.run(
+        module.generate_anki_file(
+            input_dir=in_dir,
+            output_file=out_file,
+            model="m",
+            provider="ollama",
+            deck="D",
+            chunk_size=100,
+            overlap=0,
+            limit_chunks=None,
+            batch_chunks=2,
+        )
+    )
+
+    assert len(calls) == 2
+    assert "MAIN_BLOCK_2:" in calls[0][0]
+    assert calls[0][1] is module.BatchedCardsPayload
+    assert total == 3
+
+
+def test_generate_anki_file_reuses_cached_responses(monkeypatch, tmp_path: Path):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir(parents=True, exist_ok=True)
+    (in_dir / "chapter.txt").write_text("unused", encoding="utf-8")
+
+    chunks = [_empty_context_chunk(f"chunk{index}") for index in range(1, 5)]
+    monkeypatch.setattr(module, "split_text_with_overlap", lambda *_args, **_kwargs: chunks)
+    monkeypatch.setattr(module, "create_async_client", lambda *_args, **_kwargs: None)
+
+    calls: list[str] = []
+
+    async def _fake_call_llm_async(prompt: str, **_kwargs):
+        calls.append(prompt)
+        main_block = prompt.split("MAIN_BLOCK:\n", 1)[1].split("\n", 1)[0]
+        return {"cards": [{**_sample_card(), "question": f"Question from {main_block}?"}]}
+
+    monkeypatch.setattr(module, "call_llm_async", _fake_call_llm_async)
+
+    # The real make_prompt picks its extra rule at random, so reruns render
+    # different prompts for the same chunks; the cache must still hit.
+    cache_path = tmp_path / "cache.sqlite"
+    for run in range(3):
+        total = asyncio.run(
+            module.generate_anki_file(
+                input_dir=in_dir,
+                output_file=tmp_path / f"out{run}.tsv",
+                model="m",
+                provider="ollama",
+                deck="D",
+                chunk_size=100,
+                overlap=0,
+                limit_chunks=None,
+                cache_path=cache_path,
+            )
+        )
+        assert total == 4
+
+    assert len(calls) == 4
+
+
+def test_generate_anki_file_coalesces_identical_chunks(monkeypatch, tmp_path: Path):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir(parents=True, exist_ok=True)
+    (in_dir / "chapter.txt").write_text("unused", encoding="utf-8")
+
+    # Same content each time; the real make_prompt may render each one differently.
+    chunks = [_empty_context_chunk("repeated section") for _ in range(8)]
+    monkeypatch.setattr(module, "split_text_with_overlap", lambda *_args, **_kwargs: chunks)
+    monkeypatch.setattr(module, "create_async_client", lambda *_args, **_kwargs: None)
+
+    calls: list[str] = []
+
+    async def _fake_call_llm_async(prompt: str, **_kwargs):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        return {"cards": [_sample_card()]}
+
+    monkeypatch.setattr(module, "call_llm_async", _fake_call_llm_async)
+
+    total = asyncio.run(
+        module.generate_anki_file(
+            input_dir=in_dir,
+            output_file=tmp_path / "out.tsv",
+            model="m",
+            provider="ollama",
+            deck="D",
+            chunk_size=100,
+            overlap=0,
+            limit_chunks=None,
+        )
+    )
+
+    assert total == 1
+    assert len(calls) == 1
+
+
+def test_min_chapter_chars_defaults_to_a_tenth_of_the_chunk_size(monkeypatch):
+    monkeypatch.setattr(module.sys, "argv", ["prog"])
+    assert module.parse_args().min_chapter_chars == 350
+
+    monkeypatch.setattr(module.sys, "argv", ["prog", "--chunk-size", "1000"])
+    assert module.parse_args().min_chapter_chars == 200
+
+    monkeypatch.setattr(module.sys, "argv", ["prog", "--min-chapter-chars", "50"])
+    assert module.parse_args().min_chapter_chars == 50
+
+
+def test_split_text_with_overlap_spreads_remainder_and_clamps_context():
+    assert module.build_main_ranges(10, 4) == [(0, 4), (4, 7), (7, 10)]
+
+    chunks = module.split_text_with_overlap("abcdefghij", chunk_size=4, overlap=2)
+
+    assert [chunk["main_block"] for chunk in chunks] == ["abcd", "efg", "hij"]
+    assert module.chunk_contexts("abcdefghij", chunks[0]) == ("", "ef")
+    assert module.chunk_contexts("abcdefghij", chunks[1]) == ("cd", "hi")
+    assert chunks[2]["after_end"] == 10
+
+
+def test_generate_anki_file_skips_short_chapters_and_non_prose_chunks(monkeypatch, tmp_path: Path):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir(parents=True, exist_ok=True)
+    (in_dir / "001_stub.txt").write_text("Copyright.", encoding="utf-8")
+    (in_dir / "002_body.txt").write_text(
+        "Contents: 1 2 3 4 5 6 7 8 9 " + "One. Two. Three? Four! Five.", encoding="utf-8"
+    )
+    monkeypatch.setattr(module, "make_prompt", lambda **kwargs: kwargs["main_block"])
+    monkeypatch.setattr(module, "create_async_client", lambda *_args, **_kwargs: None)
+
+    calls: list[str] = []
+
+    async def _fake_call_llm_async(prompt: str, **_kwargs):
+        calls.append(prompt)
+        return {"cards": [_sample_card()]}
+
+    monkeypatch.setattr(module, "call_llm_async", _fake_call_llm_async)
+
+    total = asyncio.run(
+        module.generate_anki_file(
+            input_dir=in_dir,
+            output_file=tmp_path / "out.tsv",
+            model="m",
+            provider="ollama",
+            deck="D",
+            chunk_size=28,
+            overlap=0,
+            limit_chunks=None,
+            chunk_range=(2, 3),
+            min_chapter_chars=20,
+            min_chunk_sentences=5,
+        )
+    )
+
+    assert total == 1
+    assert calls == ["One. Two. Three? Four! Five."]
+
+
+def test_generate_anki_file_coalesces_identical_prompts(monkeypatch, tmp_path: Path):
+    in_dir = tmp_path / "in"
+    in_dir.mkdir(parents=True, exist_ok=True)
+    (in_dir / "chapter.txt").write_text("unused", encoding="utf-8")
+
+    chunks = [_empty_context_chunk("same block") for _ in range(3)]
+    monkeypatch.setattr(module, "split_text_with_overlap", lambda *_args, **_kwargs: chunks)
+    monkeypatch.setattr(module, "make_prompt", lambda **kwargs: kwargs["main_block"])
+    monkeypatch.setattr(module, "create_async_client", lambda *_args, **_kwargs: None)
+
+    calls: list[str] = []
+
+    async def _fake_call_llm_async(prompt: str, **_kwargs):
+        calls.append(prompt)
+        await asyncio.sleep(0.01)
+        return {"cards": [_sample_card()]}
+
+    monkeypatch.setattr(module, "call_llm_async", _fake_call_llm_async)
+
+    total = asyncio.run(
+        module.generate_anki_file(
+            input_dir=in_dir,
+            output_file=tmp_path / "out.tsv",
+            model="m",
+            provider="ollama",
+            deck="D",
+            chunk_size=100,
+            overlap=0,
+            limit_chunks=None,
+        )
+    )
+
+    assert calls == ["same block"]
+    assert total == 1
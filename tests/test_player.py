@@ -1,13 +1,14 @@
+import threading
+
 import numpy as np
 
-from src.constants import SAMPLE_RATE, VOLUME
-from src.tts.player import TtsPlayer
+from src.constants import BLOCK_SIZE, SAMPLE_RATE, VOLUME
+from src.tts.player import RING_FRAMES, TtsPlayer, _SampleRing
 
 
 class FakeStream:
     def __init__(self):
         self.active = False
-        self.writes = []
 
     def start(self):
         self.active = True
@@ -15,9 +16,6 @@ class FakeStream:
     def stop(self):
         self.active = False
 
-    def write(self, block):
-        self.writes.append(np.asarray(block))
-
 
 def _noop_pipeline(_text, **_kwargs):
     if False:
@@ -47,10 +45,25 @@ def test_ms_sample_roundtrip():
     assert player._samples_to_ms(SAMPLE_RATE) == 1000
 
 
-def test_play_segment_writes_all_samples_and_updates_offsets():
+def test_sample_ring_wraps_around_capacity():
+    ring = _SampleRing(4)
+    out = np.zeros(3, dtype=np.float32)
+
+    assert ring.write(np.array([1, 2, 3], dtype=np.float32)) == 3
+    assert ring.read_into(out) == 3
+    assert ring.write(np.array([4, 5, 6, 7, 8], dtype=np.float32)) == 4
+    assert ring.read_into(out) == 3
+
+    assert out.tolist() == [4.0, 5.0, 6.0]
+    assert ring.pending == 1
+
+
+def test_play_segment_feeds_callback_and_updates_offsets():
     player = TtsPlayer(_noop_pipeline)
     stream = FakeStream()
     stream.start()
+    ring = _SampleRing(RING_FRAMES)
+    callback = player._make_audio_callback(ring)
     segment = np.linspace(-0.5, 0.5, 5000, dtype=np.float32)
 
     player.resume_event.set()
@@ -58,12 +71,41 @@ def test_play_segment_writes_all_samples_and_updates_offsets():
     player.offset_samples = 0
     player.offset_ms = 0
 
-    stopped = player._play_segment(segment, stream)
+    played = []
+    done = threading.Event()
+
+    def _device():
+        while not done.is_set() or ring.pending:
+            outdata = np.empty((BLOCK_SIZE, 1), dtype=np.float32)
+            before = player.offset_samples
+            callback(outdata, BLOCK_SIZE, None, None)
+            played.append(outdata[: player.offset_samples - before, 0].copy())
+
+    device = threading.Thread(target=_device)
+    device.start()
+    stopped = player._play_segment(segment, stream, ring)
+    done.set()
+    device.join(timeout=5)
 
     assert stopped is False
     assert player.offset_samples == len(segment)
     assert player.offset_ms == player._samples_to_ms(len(segment))
-    assert sum(block.size for block in stream.writes) == len(segment)
+    assert np.array_equal(np.concatenate(played), segment)
+
+
+def test_audio_callback_outputs_silence_while_paused():
+    player = TtsPlayer(_noop_pipeline)
+    ring = _SampleRing(8)
+    ring.write(np.ones(8, dtype=np.float32))
+    callback = player._make_audio_callback(ring)
+    outdata = np.full((4, 1), 9.0, dtype=np.float32)
+
+    player.resume_event.clear()
+    callback(outdata, 4, None, None)
+
+    assert outdata.tolist() == [[0.0]] * 4
+    assert ring.pending == 8
+    assert player.offset_samples == 0
 
 
 def test_pause_resume_toggles_flags_and_events():
@@ -97,3 +139,78 @@ def test_stop_resets_state():
     assert player.offset_samples == 0
     assert player.text == ""
     assert player.stop_event.is_set() is True
+
+
+def test_chunk_segments_replays_completed_synthesis_from_cache(tmp_path, monkeypatch):
+    from src.tts import player as player_module
+
+    monkeypatch.setattr(player_module, "TTS_AUDIO_CACHE", True)
+    monkeypatch.setattr(player_module, "TTS_AUDIO_CACHE_DIR", str(tmp_path))
+    calls = []
+
+    def _pipeline(text, **_kwargs):
+        calls.append(text)
+        for value in (0.1, 0.2):
+            yield None, None, np.full(3, value, dtype=np.float32)
+
+    player = TtsPlayer(_pipeline, audio_cache=True)
+    first = np.concatenate(list(player._chunk_segments("hello")))
+    assert player.has_cached_audio("hello")
+
+    cached = list(player._chunk_segments("hello"))
+
+    assert calls == ["hello"]
+    assert len(cached) == 1
+    assert np.array_equal(cached[0], first)
+
+
+def test_chunk_segments_skips_cache_when_synthesis_is_interrupted(tmp_path, monkeypatch):
+    from src.tts import player as player_module
+
+    monkeypatch.setattr(player_module, "TTS_AUDIO_CACHE", True)
+    monkeypatch.setattr(player_module, "TTS_AUDIO_CACHE_DIR", str(tmp_path))
+
+    def _pipeline(_text, **_kwargs):
+        for _ in range(3):
+            yield None, None, np.zeros(3, dtype=np.float32)
+
+    player = TtsPlayer(_pipeline, audio_cache=True)
+    segments = player._chunk_segments("hello")
+    next(segments)
+    segments.close()
+
+    assert not player.has_cached_audio("hello")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_audio_cache_is_off_unless_requested(tmp_path, monkeypatch):
+    from src.tts import player as player_module
+
+    monkeypatch.setattr(player_module, "TTS_AUDIO_CACHE", True)
+    monkeypatch.setattr(player_module, "TTS_AUDIO_CACHE_DIR", str(tmp_path))
+
+    def _pipeline(_text, **_kwargs):
+        yield None, None, np.zeros(3, dtype=np.float32)
+
+    player = TtsPlayer(_pipeline)
+    list(player._chunk_segments("clipboard text"))
+
+    assert not player.has_cached_audio("clipboard text")
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_evict_audio_cache_removes_least_recently_played(tmp_path, monkeypatch):
+    import os
+
+    from src.tts import player as player_module
+
+    monkeypatch.setattr(player_module, "TTS_AUDIO_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(player_module, "TTS_AUDIO_CACHE_MAX_BYTES", 20)
+    for age, name in enumerate(["new.f32", "mid.f32", "old.f32"]):
+        path = tmp_path / name
+        path.write_bytes(b"x" * 10)
+        os.utime(path, (1000 - age, 1000 - age))
+
+    TtsPlayer._evict_audio_cache(keep_path=str(tmp_path / "old.f32"))
+
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["new.f32", "old.f32"]
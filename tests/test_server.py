@@ -12,6 +12,7 @@ class FakePlayer:
         self.loaded_texts = []
         self.played_texts = []
         self.stop_calls = 0
+        self.on_finished = None
         self._current_text = ""
         self._lock = threading.Lock()
 
@@ -24,12 +25,15 @@ class FakePlayer:
         with self._lock:
             self.is_playing = True
             self.played_texts.append(self._current_text)
-        threading.Thread(target=self._finish_playback, daemon=True).start()
+        timer = threading.Timer(self.play_duration, self._finish_playback)
+        timer.daemon = True
+        timer.start()
 
     def _finish_playback(self):
-        time.sleep(self.play_duration)
         with self._lock:
             self.is_playing = False
+        if self.on_finished:
+            self.on_finished()
 
     def stop(self):
         with self._lock:
@@ -49,7 +53,7 @@ def _wait_until(predicate, timeout=1.0, interval=0.01):
 
 def test_speak_clears_queue_and_plays_immediately():
     player = FakePlayer(play_duration=0.05)
-    controller = TtsQueueController(player, poll_interval=0.005)
+    controller = TtsQueueController(player)
     try:
         controller.add_to_queue("queued one")
         controller.add_to_queue("queued two")
@@ -64,7 +68,7 @@ def test_speak_clears_queue_and_plays_immediately():
 
 def test_add_to_queue_plays_text_in_order():
     player = FakePlayer(play_duration=0.02)
-    controller = TtsQueueController(player, poll_interval=0.005)
+    controller = TtsQueueController(player)
     try:
         controller.add_to_queue("first")
         controller.add_to_queue("second")
@@ -78,7 +82,7 @@ def test_add_to_queue_plays_text_in_order():
 
 def test_stop_clears_queue_and_stops_current_playback():
     player = FakePlayer(play_duration=0.10)
-    controller = TtsQueueController(player, poll_interval=0.005)
+    controller = TtsQueueController(player)
     try:
         controller.speak("running")
         controller.add_to_queue("later")
@@ -90,3 +94,76 @@ def test_stop_clears_queue_and_stops_current_playback():
         assert controller.queue_size() == 0
     finally:
         controller.shutdown()
+
+
+def _post(port, path, body=None, method="POST"):
+    import http.client
+    import json
+
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=2)
+    try:
+        data = None if body is None else json.dumps(body)
+        connection.request(method, path, body=data, headers={"Content-Type": "application/json"})
+        response = connection.getresponse()
+        raw = response.read()
+        return response.status, (json.loads(raw) if raw else None)
+    finally:
+        connection.close()
+
+
+def test_http_server_routes_requests_to_controller():
+    import socket
+
+    from src.tts.server import MAX_BODY_BYTES, MAX_LINE_BYTES, LocalTtsHttpServer
+
+    player = FakePlayer(play_duration=1.0)
+    controller = TtsQueueController(player)
+    server = LocalTtsHttpServer(controller, port=0, max_workers=2)
+    server.start()
+    try:
+        assert _post(server.port, "/speak", {"text": "hello"}) == (200, {"ok": True, "queue_size": 0})
+        assert _post(server.port, "/addToQueue", {"text": "next"}) == (200, {"ok": True, "queue_size": 1})
+        assert _post(server.port, "/addToQueue", {"text": "  "})[0] == 400
+        assert _post(server.port, "/missing", {})[0] == 404
+        with socket.create_connection(("127.0.0.1", server.port), timeout=2) as client:
+            client.sendall(f"POST /speak HTTP/1.1\r\nContent-Length: {MAX_BODY_BYTES + 1}\r\n\r\n".encode())
+            assert client.recv(4096).startswith(b"HTTP/1.1 413 ")
+        with socket.create_connection(("127.0.0.1", server.port), timeout=2) as client:
+            # No line break: the server consumes all of it before giving up on the line.
+            client.sendall(b"P" * (MAX_LINE_BYTES + 1))
+            assert client.recv(4096).startswith(b"HTTP/1.1 400 ")
+        assert _post(server.port, "/speak", method="OPTIONS") == (204, None)
+        assert _post(server.port, "/stop") == (200, {"ok": True, "queue_size": 0})
+        assert player.played_texts == ["hello"]
+    finally:
+        server.shutdown()
+        controller.shutdown()
+
+
+def test_http_server_keeps_connections_alive_between_requests():
+    import http.client
+
+    from src.tts.server import LocalTtsHttpServer
+
+    player = FakePlayer(play_duration=1.0)
+    controller = TtsQueueController(player)
+    server = LocalTtsHttpServer(controller, port=0, max_workers=2)
+    server.start()
+    connection = http.client.HTTPConnection("127.0.0.1", server.port, timeout=2)
+    try:
+        connection.request("POST", "/speak", body='{"text": "one"}')
+        first = connection.getresponse()
+        first.read()
+        sock = connection.sock
+
+        connection.request("POST", "/addToQueue", body='{"text": "two"}')
+        second = connection.getresponse()
+        second.read()
+
+        assert first.getheader("Connection") == "keep-alive"
+        assert second.status == 200
+        assert sock is not None and connection.sock is sock
+    finally:
+        connection.close()
+        server.shutdown()
+        controller.shutdown()
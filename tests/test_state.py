@@ -0,0 +1,26 @@
+import os
+
+from src import state as state_module
+from src.state import ReaderState
+
+
+def test_save_writes_atomically_and_skips_unchanged_state(tmp_path, monkeypatch):
+    state_file = tmp_path / "state.json"
+    monkeypatch.setattr(state_module, "STATE_FILE", str(state_file))
+    state = ReaderState()
+    state.book_path = "book.epub"
+    state.offset_ms = 1500
+
+    state.save()
+    os.utime(state_file, ns=(0, 0))
+    state.save()
+
+    assert state_file.stat().st_mtime_ns == 0
+    assert not (tmp_path / "state.json.tmp").exists()
+
+    state.chapter_index = 3
+    state.save()
+    loaded = ReaderState()
+    loaded.load()
+
+    assert (loaded.book_path, loaded.chapter_index, loaded.offset_ms) == ("book.epub", 3, 1500)
@@ -1,3 +1,4 @@
+import ctypes
 import threading
 import time
 
@@ -5,6 +6,8 @@ import keyboard
 import win32api
 import win32clipboard
 import win32con
+import win32event
+import win32gui
 from kokoro import KPipeline
 from src.tts.player import TtsPlayer
 from src.tts.server import start_local_tts_server
@@ -15,6 +18,8 @@ SPEED = 1.2
 
 DEBUG = True
 
+WM_CLIPBOARDUPDATE = 0x031D
+
 
 def _log(message):
     if DEBUG:
@@ -78,7 +83,47 @@ def _get_clipboard_text():
     return text
 
 
-def _wait_for_clipboard_text(previous_text, previous_seq, timeout=1.0, interval=0.05):
+class _ClipboardListener:
+    """Hidden message-only window that wakes its creating thread on clipboard changes.
+
+    Must be created, waited on and closed from the same thread.
+    """
+
+    def __init__(self):
+        self.hwnd = win32gui.CreateWindowEx(
+            0, "STATIC", "tts-clipboard-listener", 0, 0, 0, 0, 0, win32con.HWND_MESSAGE, 0, 0, None
+        )
+        if not ctypes.windll.user32.AddClipboardFormatListener(self.hwnd):
+            win32gui.DestroyWindow(self.hwnd)
+            raise OSError("AddClipboardFormatListener failed")
+
+    def wait(self, timeout):
+        """Block until a clipboard update message arrives or `timeout` seconds pass."""
+        timeout_ms = max(int(timeout * 1000), 0)
+        result = win32event.MsgWaitForMultipleObjects([], False, timeout_ms, win32event.QS_ALLINPUT)
+        if result == win32event.WAIT_TIMEOUT:
+            return False
+        updated = False
+        while True:
+            has_message, message = win32gui.PeekMessage(self.hwnd, 0, 0, win32con.PM_REMOVE)
+            if not has_message:
+                return updated
+            updated = updated or message[1] == WM_CLIPBOARDUPDATE
+
+    def close(self):
+        ctypes.windll.user32.RemoveClipboardFormatListener(self.hwnd)
+        win32gui.DestroyWindow(self.hwnd)
+
+
+def _create_clipboard_listener():
+    try:
+        return _ClipboardListener()
+    except Exception as exc:
+        _log(f"Clipboard listener unavailable, polling instead: {exc}")
+        return None
+
+
+def _wait_for_clipboard_text(previous_text, previous_seq, listener=None, timeout=1.0, interval=0.05):
     _log("Waiting for clipboard text to change")
     deadline = time.time() + timeout
     while time.time() < deadline:
@@ -88,7 +133,11 @@ def _wait_for_clipboard_text(previous_text, previous_seq, timeout=1.0, interval=
             if current and current != previous_text:
                 _log(f"Clipboard updated (length {len(current)})")
                 return current
-        time.sleep(interval)
+        if listener is not None:
+            # Wakes on WM_CLIPBOARDUPDATE instead of sleeping a full interval.
+            listener.wait(deadline - time.time())
+        else:
+            time.sleep(interval)
     _log("Clipboard did not change before timeout")
     return _get_clipboard_text()
 
@@ -119,8 +168,14 @@ def _handle_hotkey(controller):
     previous_text = _get_clipboard_text()
     previous_seq = win32clipboard.GetClipboardSequenceNumber()
     _log(f"Clipboard sequence: {previous_seq}")
-    _copy_selection()
-    text = _wait_for_clipboard_text(previous_text, previous_seq)
+    # Listen before sending Ctrl+C so the update can't be missed.
+    listener = _create_clipboard_listener()
+    try:
+        _copy_selection()
+        text = _wait_for_clipboard_text(previous_text, previous_seq, listener)
+    finally:
+        if listener is not None:
+            listener.close()
     _restore_clipboard(saved)
 
     if text.strip():